@@ -1,11 +1,15 @@
 from __future__ import annotations
 
 import os
+import re
 import shlex
 import shutil
 import subprocess
+import threading
+import time
 from dataclasses import dataclass
 from pathlib import Path
+from typing import Callable
 
 
 @dataclass(frozen=True)
@@ -212,19 +216,139 @@ def push_notification(
         return
 
 
-def safe_delete(target: str, base_dir: str) -> ExecResult:
-    """Delete a file or directory only if it is inside base_dir."""
-    base = Path(base_dir).expanduser().resolve()
-    path = Path(target).expanduser().resolve()
+# Trash entries are "<ms>-<pid>-<seq>-<name>"; the marker file tells a
+# trash directory we created from a user folder that merely has its name.
+_TRASH_MARKER = ".voice-trash"
+_TRASH_ENTRY = re.compile(r"^\d+-(?P<pid>\d+)-\d+-.+$")
+
 
+def _pid_alive(pid: int) -> bool:
     try:
-        path.relative_to(base)
-    except ValueError:
-        return ExecResult(False, f"Refusé (hors base): {path}")
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class Trash:
+    """Deferred deletion inside `base_dir`.
+
+    `move()` renames the target into `trash_dir` (same filesystem, so it is
+    atomic and instant); a background thread purges each entry after the
+    `undo_s` window with idle I/O priority, then reports through `notify`.
+    `undo()` moves the most recent pending entry back.
+
+    The trash must be strictly inside `base_dir` and either new/empty or
+    already marked as ours; only entries named by a process that is gone
+    are purged at startup, so several instances can share it.
+    """
+
+    def __init__(
+        self,
+        base_dir: str,
+        trash_dir: str | None = None,
+        *,
+        undo_s: float = 30.0,
+        notify: Callable[[ExecResult], None] | None = None,
+    ) -> None:
+        self.base = Path(base_dir).expanduser().resolve()
+        self.dir = Path(trash_dir).expanduser().resolve() if trash_dir else self.base / ".voice-trash"
+        self.undo_s = max(0.0, float(undo_s))
+        self.notify = notify
+        if self.base not in self.dir.parents:
+            raise ValueError(f"La corbeille doit être dans {self.base} (et différente): {self.dir}")
+        marker = self.dir / _TRASH_MARKER
+        if self.dir.is_dir() and not marker.exists() and any(self.dir.iterdir()):
+            raise ValueError(f"Dossier non vide et non marqué comme corbeille: {self.dir}")
+        self.dir.mkdir(parents=True, exist_ok=True)
+        marker.touch()
+        # (deadline, original path, path in trash), oldest first
+        self._pending: list[tuple[float, Path, Path]] = []
+        self._cond = threading.Condition()
+        self._seq = 0
+        # Leftovers from a previous run can't be undone anymore: purge them now
+        for entry in sorted(self.dir.iterdir()):
+            m = _TRASH_ENTRY.match(entry.name)
+            if m and int(m.group("pid")) != os.getpid() and not _pid_alive(int(m.group("pid"))):
+                self._pending.append((0.0, entry, entry))
+        self._thread = threading.Thread(target=self._run, name="trash-purge", daemon=True)
+        self._thread.start()
+
+    def contains(self, path: Path) -> bool:
+        return path == self.dir or self.dir in path.parents or path in self.dir.parents
+
+    def move(self, path: Path) -> ExecResult:
+        try:
+            same_fs = os.stat(path, follow_symlinks=False).st_dev == os.stat(self.dir).st_dev
+        except OSError as exc:
+            return ExecResult(False, f"Erreur suppression: {exc}")
+        if not same_fs:
+            # Rename would copy across filesystems: delete in place instead
+            return _delete_now(path)
+
+        with self._cond:
+            self._seq += 1
+            dest = self.dir / f"{int(time.time() * 1000)}-{os.getpid()}-{self._seq}-{path.name}"
+            try:
+                os.rename(path, dest)
+            except OSError as exc:
+                return ExecResult(False, f"Erreur suppression: {exc}")
+            self._pending.append((time.monotonic() + self.undo_s, path, dest))
+            self._cond.notify()
+        if self.undo_s > 0:
+            return ExecResult(True, f"Supprimé: {path} (annulable {self.undo_s:g}s: 'annule')")
+        return ExecResult(True, f"Supprimé: {path}")
+
+    def undo(self) -> ExecResult:
+        with self._cond:
+            now = time.monotonic()
+            for i in range(len(self._pending) - 1, -1, -1):
+                deadline, original, dest = self._pending[i]
+                if deadline < now or original == dest:
+                    continue
+                if original.exists() or original.is_symlink():
+                    return ExecResult(False, f"Restauration impossible (existe déjà): {original}")
+                try:
+                    os.rename(dest, original)
+                except OSError as exc:
+                    return ExecResult(False, f"Erreur restauration: {exc}")
+                del self._pending[i]
+                return ExecResult(True, f"Restauré: {original}")
+        return ExecResult(False, "Rien à annuler")
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending or self._pending[0][0] > time.monotonic():
+                    timeout = self._pending[0][0] - time.monotonic() if self._pending else None
+                    self._cond.wait(timeout)
+                _, original, dest = self._pending.pop(0)
+            result = _purge(dest)
+            if original != dest and self.notify is not None:
+                if result.ok:
+                    self.notify(ExecResult(True, f"Purgé: {original}"))
+                else:
+                    self.notify(ExecResult(False, f"Purge échouée: {original} ({result.message})"))
+
+
+def _purge(path: Path) -> ExecResult:
+    """Remove a trash entry with idle I/O priority (ionice) when available."""
+    if _which("ionice") and _which("rm"):
+        proc = subprocess.run(
+            ["ionice", "-c", "3", "nice", "-n", "19", "rm", "-rf", "--one-file-system", "--", str(path)],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        if proc.returncode == 0:
+            return ExecResult(True, str(path))
+        return ExecResult(False, proc.stderr.strip() or f"rm code {proc.returncode}")
+    return _delete_now(path)
 
-    if not path.exists():
-        return ExecResult(False, f"Introuvable: {path}")
 
+def _delete_now(path: Path) -> ExecResult:
     try:
         if path.is_dir() and not path.is_symlink():
             shutil.rmtree(path)
@@ -233,3 +357,36 @@ def safe_delete(target: str, base_dir: str) -> ExecResult:
         return ExecResult(True, f"Supprimé: {path}")
     except Exception as exc:  # noqa: BLE001
         return ExecResult(False, f"Erreur suppression: {exc}")
+
+
+def safe_delete(target: str, base_dir: str, trash: Trash | None = None) -> ExecResult:
+    """Delete a file or directory only if it is inside base_dir.
+
+    With a `trash`, the target is moved there (instant, undoable) and purged
+    in the background; otherwise it is deleted synchronously.
+    """
+    refusal = delete_refusal(target, base_dir, trash)
+    if refusal is not None:
+        return refusal
+    path = Path(target).expanduser().resolve()
+    if trash is not None:
+        return trash.move(path)
+    return _delete_now(path)
+
+
+def delete_refusal(target: str, base_dir: str, trash: Trash | None = None) -> ExecResult | None:
+    """Why safe_delete would refuse `target` (None if it would go ahead)."""
+    base = Path(base_dir).expanduser().resolve()
+    path = Path(target).expanduser().resolve()
+
+    try:
+        path.relative_to(base)
+    except ValueError:
+        return ExecResult(False, f"Refusé (hors base): {path}")
+
+    if not path.exists():
+        return ExecResult(False, f"Introuvable: {path}")
+
+    if trash is not None and trash.contains(path):
+        return ExecResult(False, f"Refusé (corbeille): {path}")
+    return None
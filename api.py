@@ -0,0 +1,250 @@
+from __future__ import annotations
+
+import json
+import os
+import socket
+import stat
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from actions import ExecResult
+from intents import Intent, IntentContext, execute_intent, parse_intent, preview_intent
+
+# Intents whose effect depends on what ran before (active window, workspace,
+# last deletion): they run alone, in request order, between concurrent groups.
+_ORDERED_KINDS = {"workspace", "maximize", "undo"}
+
+_MAX_REQUEST_BYTES = 1 << 20
+
+
+def _resource(intent: Intent) -> Optional[str]:
+    """What an action touches: two actions on the same app/path never overlap."""
+    if intent.app is not None:
+        return f"app:{intent.app.command}"
+    if intent.target:
+        return f"path:{intent.target}"
+    return None
+
+
+def _row(text: str, intent: Optional[Intent], result: Optional[ExecResult], parse_ms: float, exec_ms: float) -> Dict[str, Any]:
+    return {
+        "text": text,
+        "intent": intent.kind if intent is not None else None,
+        "app": intent.app.name if intent is not None and intent.app is not None else None,
+        "ok": result.ok if result is not None else False,
+        "message": result.message if result is not None else "Commande non reconnue",
+        "timings": {
+            "parse_ms": round(parse_ms, 3),
+            "exec_ms": round(exec_ms, 3),
+            "total_ms": round(parse_ms + exec_ms, 3),
+        },
+    }
+
+
+class CommandServer:
+    """Local text-command API on a Unix stream socket.
+
+    One JSON request per line, one JSON response per line:
+        {"commands": ["ouvre firefox", "va au bureau 2"], "dry_run": false}
+        -> {"ok": true, "results": [{"text", "intent", "app", "ok", "message", "timings"}], "elapsed_ms": ...}
+    Commands go through the same parse_intent/execute_intent pipeline as
+    voice input (without the voice cooldown). In a batch, independent
+    actions (open/close/delete on distinct apps/paths) run concurrently;
+    workspace/maximize/undo keep their order. `ops` maps extra {"op": name} requests to handlers.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ctx: IntentContext,
+        *,
+        workers: int = 4,
+        on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+        ops: Optional[Dict[str, Callable[[], Dict[str, Any]]]] = None,
+    ) -> None:
+        self.path = Path(path).expanduser()
+        self.ctx = ctx
+        self.on_result = on_result
+        self.ops = dict(ops or {})
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="api-exec")
+        self._server: Optional[socket.socket] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self.path.exists() and stat.S_ISSOCK(os.stat(self.path).st_mode):
+            self.path.unlink()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(str(self.path))
+        os.chmod(self.path, 0o600)
+        server.listen(8)
+        self._server = server
+        self._thread = threading.Thread(target=self._accept_loop, name="api", daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        if self._server is not None:
+            try:
+                self._server.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._server.close()
+            self._server = None
+            try:
+                self.path.unlink()
+            except OSError:
+                pass
+        self._pool.shutdown(wait=False)
+
+    def _accept_loop(self) -> None:
+        server = self._server
+        while server is not None:
+            try:
+                conn, _ = server.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve_conn, args=(conn,), name="api-conn", daemon=True).start()
+
+    def _serve_conn(self, conn: socket.socket) -> None:
+        with conn, conn.makefile("rwb") as f:
+            while True:
+                line = f.readline(_MAX_REQUEST_BYTES)
+                if not line:
+                    return
+                try:
+                    req = json.loads(line.decode("utf-8"))
+                    resp = self.handle_request(req if isinstance(req, dict) else {"commands": req})
+                except (UnicodeDecodeError, json.JSONDecodeError) as exc:
+                    resp = {"ok": False, "error": f"Requête invalide: {exc}"}
+                f.write(json.dumps(resp, ensure_ascii=False).encode("utf-8") + b"\n")
+                f.flush()
+
+    def handle_request(self, req: Dict[str, Any]) -> Dict[str, Any]:
+        t0 = time.perf_counter()
+        op = req.get("op")
+        if op:
+            handler = self.ops.get(str(op))
+            if handler is None:
+                return {"ok": False, "error": f"Opération inconnue: {op}"}
+            try:
+                return {"ok": True, **handler()}
+            except Exception as exc:  # noqa: BLE001
+                return {"ok": False, "error": f"Erreur {op}: {exc}"}
+
+        commands = req.get("commands")
+        if commands is None and "command" in req:
+            commands = [req["command"]]
+        if not isinstance(commands, list) or not all(isinstance(c, str) for c in commands):
+            return {"ok": False, "error": "'commands' doit être une liste de textes"}
+
+        try:
+            results = self.run_commands(commands, dry_run=bool(req.get("dry_run", False)))
+        except Exception as exc:  # noqa: BLE001
+            return {"ok": False, "error": f"Erreur: {exc}"}
+        return {
+            "ok": all(r["ok"] for r in results),
+            "results": results,
+            "elapsed_ms": round((time.perf_counter() - t0) * 1000.0, 3),
+        }
+
+    def run_commands(self, commands: List[str], *, dry_run: bool = False) -> List[Dict[str, Any]]:
+        parsed: List[Tuple[str, Optional[Intent], float]] = []
+        for text in commands:
+            t0 = time.perf_counter()
+            intent = parse_intent(text, self.ctx)
+            parsed.append((text, intent, (time.perf_counter() - t0) * 1000.0))
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(parsed)
+        group: List[Tuple[int, Future]] = []
+        busy: Set[str] = set()
+
+        def flush() -> None:
+            for i, fut in group:
+                results[i] = fut.result()
+            group.clear()
+            busy.clear()
+
+        for i, (text, intent, parse_ms) in enumerate(parsed):
+            if intent is None or intent.error or dry_run:
+                result = None if intent is None else preview_intent(intent, self.ctx)
+                results[i] = _row(text, intent, result, parse_ms, 0.0)
+            elif intent.kind in _ORDERED_KINDS:
+                flush()
+                results[i] = self._execute(text, intent, parse_ms)
+            else:
+                resource = _resource(intent)
+                if resource is not None and resource in busy:
+                    flush()
+                if resource is not None:
+                    busy.add(resource)
+                group.append((i, self._pool.submit(self._execute, text, intent, parse_ms)))
+        flush()
+
+        out = [r for r in results if r is not None]
+        if self.on_result is not None and not dry_run:
+            for r in out:
+                self.on_result(r)
+        return out
+
+    def _execute(self, text: str, intent: Intent, parse_ms: float) -> Dict[str, Any]:
+        t0 = time.perf_counter()
+        try:
+            result = execute_intent(intent, self.ctx)
+        except Exception as exc:  # noqa: BLE001
+            result = ExecResult(False, f"Erreur: {exc}")
+        return _row(text, intent, result, parse_ms, (time.perf_counter() - t0) * 1000.0)
+
+
+def send_request(path: str, req: Dict[str, Any], *, timeout: float = 60.0) -> Dict[str, Any]:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(str(Path(path).expanduser()))
+        with sock.makefile("rwb") as f:
+            f.write(json.dumps(req, ensure_ascii=False).encode("utf-8") + b"\n")
+            f.flush()
+            line = f.readline()
+    if not line:
+        raise ConnectionError("Connexion fermée sans réponse")
+    return json.loads(line.decode("utf-8"))
+
+
+def run_send(
+    socket_path: str,
+    commands: List[str],
+    *,
+    read_stdin: bool = False,
+    dry_run: bool = False,
+    as_json: bool = False,
+) -> int:
+    """CLI client: send commands in one request and print the results."""
+    if read_stdin:
+        commands = commands + [line.strip() for line in sys.stdin if line.strip()]
+    if not commands:
+        print("Aucune commande", flush=True)
+        return 2
+    if not socket_path:
+        print("Socket API non configuré ('api_socket' dans la config ou --socket)", flush=True)
+        return 2
+
+    t0 = time.perf_counter()
+    try:
+        resp = send_request(socket_path, {"commands": commands, "dry_run": dry_run})
+    except (OSError, ConnectionError, json.JSONDecodeError) as exc:
+        print(f"API injoignable ({socket_path}): {exc}", flush=True)
+        return 2
+    rtt_ms = (time.perf_counter() - t0) * 1000.0
+
+    if as_json:
+        print(json.dumps({**resp, "rtt_ms": round(rtt_ms, 3)}, ensure_ascii=False), flush=True)
+    elif "error" in resp:
+        print(resp["error"], flush=True)
+    else:
+        for r in resp.get("results", []):
+            mark = "ok " if r["ok"] else "ERR"
+            print(f"{mark} {r['text']!r}: {r['message']} ({r['timings']['total_ms']:.1f} ms)", flush=True)
+        print(f"{len(commands)} commandes, serveur {resp.get('elapsed_ms', 0.0):.1f} ms, aller-retour {rtt_ms:.1f} ms", flush=True)
+    return 0 if resp.get("ok") else 1
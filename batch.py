@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import io
+import json
+import multiprocessing
+import os
+import sys
+import time
+import wave
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from intents import IntentContext, context_from_config, parse_intent, preview_intent
+
+AUDIO_SUFFIXES = {".wav", ".raw", ".pcm"}
+
+# Per-worker state, set once by _init_worker
+_model: Any = None
+_ctx: Optional[IntentContext] = None
+_sample_rate = 16000
+_load_ms = 0.0
+_load_error = ""
+
+
+class ModelLoadError(RuntimeError):
+    """The Vosk model could not be loaded in a worker."""
+
+
+def find_audio_files(root: Path) -> List[Path]:
+    if root.is_file():
+        return [root]
+    return sorted(p for p in root.rglob("*") if p.is_file() and p.suffix.lower() in AUDIO_SUFFIXES)
+
+
+def _read_pcm(path: Path, default_rate: int) -> Tuple[bytes, int]:
+    """Return (int16 mono PCM, sample rate) for a WAV or headerless PCM file."""
+    data = path.read_bytes()
+    if data[:4] != b"RIFF":
+        return data[: len(data) // 2 * 2], default_rate
+    with wave.open(io.BytesIO(data), "rb") as wf:
+        if wf.getnchannels() != 1 or wf.getsampwidth() != 2:
+            raise ValueError("WAV non supporté (attendu: mono, 16 bits)")
+        return wf.readframes(wf.getnframes()), wf.getframerate()
+
+
+def _init_worker(cfg: Dict[str, Any]) -> None:
+    global _model, _ctx, _sample_rate, _load_ms, _load_error
+    # An exception here would make multiprocessing.Pool respawn the worker
+    # forever: remember it and fail the first task instead.
+    try:
+        from vosk import Model, SetLogLevel
+
+        SetLogLevel(-1)
+        t0 = time.perf_counter()
+        _model = Model(str(Path(cfg["vosk_model_path"]).expanduser()))
+        _load_ms = (time.perf_counter() - t0) * 1000.0
+    except Exception as exc:  # noqa: BLE001
+        _load_error = f"{type(exc).__name__}: {exc}"
+        return
+    _ctx = context_from_config(cfg)
+    _sample_rate = int(cfg.get("sample_rate", 16000))
+
+
+def _process_file(path_str: str) -> Dict[str, Any]:
+    if _load_error:
+        raise ModelLoadError(_load_error)
+
+    from vosk import KaldiRecognizer
+
+    path = Path(path_str)
+    row: Dict[str, Any] = {"file": path_str, "worker": os.getpid()}
+    t0 = time.perf_counter()
+    try:
+        pcm, rate = _read_pcm(path, _sample_rate)
+    except (OSError, ValueError, EOFError, wave.Error) as exc:
+        row["error"] = str(exc)
+        return row
+
+    t1 = time.perf_counter()
+    rec = KaldiRecognizer(_model, rate)
+    texts: List[str] = []
+    step = 8000  # same chunking as the live 16 kHz stream
+    for i in range(0, len(pcm), step):
+        if rec.AcceptWaveform(pcm[i : i + step]):
+            texts.append((json.loads(rec.Result()).get("text") or "").strip())
+    texts.append((json.loads(rec.FinalResult()).get("text") or "").strip())
+    text = " ".join(t for t in texts if t)
+
+    t2 = time.perf_counter()
+    assert _ctx is not None
+    intent = parse_intent(text, _ctx)
+    preview = preview_intent(intent, _ctx) if intent is not None else None
+    t3 = time.perf_counter()
+
+    audio_ms = len(pcm) / 2 / rate * 1000.0
+    decode_ms = (t2 - t1) * 1000.0
+    row.update(
+        {
+            "text": text,
+            "intent": intent.kind if intent is not None else None,
+            "app": intent.app.name if intent is not None and intent.app is not None else None,
+            "command": intent.app.command if intent is not None and intent.app is not None else None,
+            "score": round(intent.app.score, 4) if intent is not None and intent.app is not None else None,
+            "ok": preview.ok if preview is not None else None,
+            "message": preview.message if preview is not None else None,
+            "timings": {
+                "read_ms": round((t1 - t0) * 1000.0, 3),
+                "decode_ms": round(decode_ms, 3),
+                "intent_ms": round((t3 - t2) * 1000.0, 3),
+                "audio_ms": round(audio_ms, 3),
+                "rtf": round(decode_ms / audio_ms, 4) if audio_ms else None,
+                "model_load_ms": round(_load_ms, 1),
+            },
+        }
+    )
+    return row
+
+
+def _iter_results(files: List[Path], cfg: Dict[str, Any], workers: int) -> Iterator[Dict[str, Any]]:
+    # Small chunks keep workers busy until the end without per-file IPC overhead
+    chunksize = max(1, min(16, len(files) // (workers * 4) or 1))
+    with multiprocessing.Pool(processes=workers, initializer=_init_worker, initargs=(cfg,)) as pool:
+        yield from pool.imap_unordered(_process_file, [str(p) for p in files], chunksize=chunksize)
+
+
+def run_batch(
+    cfg: Dict[str, Any],
+    input_path: str,
+    *,
+    out_path: str = "-",
+    workers: Optional[int] = None,
+) -> int:
+    """Transcribe + label every audio file under `input_path` into JSONL (dry-run, no action executed)."""
+    root = Path(input_path).expanduser()
+    if not root.exists():
+        print(f"Entrée introuvable: {root}", file=sys.stderr, flush=True)
+        return 2
+    files = find_audio_files(root)
+    if not files:
+        print(f"Aucun fichier audio ({', '.join(sorted(AUDIO_SUFFIXES))}) dans {root}", file=sys.stderr, flush=True)
+        return 2
+
+    n_workers = max(1, min(workers or os.cpu_count() or 1, len(files)))
+    out = sys.stdout if out_path == "-" else open(out_path, "w", encoding="utf-8")
+    t0 = time.perf_counter()
+    done = errors = 0
+    audio_ms = 0.0
+    try:
+        for row in _iter_results(files, cfg, n_workers):
+            out.write(json.dumps(row, ensure_ascii=False) + "\n")
+            done += 1
+            if "error" in row:
+                errors += 1
+            else:
+                audio_ms += row["timings"]["audio_ms"]
+    except ModelLoadError as exc:
+        print(f"Erreur chargement modèle Vosk: {exc}", file=sys.stderr, flush=True)
+        return 3
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    wall = time.perf_counter() - t0
+    speed = (audio_ms / 1000.0) / wall if wall > 0 else 0.0
+    print(
+        f"Batch: {done} fichiers ({errors} erreurs), {n_workers} workers, "
+        f"{wall:.1f}s, {done / wall if wall > 0 else 0.0:.1f} fichiers/s, audio x{speed:.1f} temps réel",
+        file=sys.stderr,
+        flush=True,
+    )
+    return 0 if errors == 0 else 1
@@ -0,0 +1,385 @@
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_right
+from collections import deque
+from collections.abc import ItemsView, Iterable, Iterator, Mapping
+from itertools import accumulate, islice
+from os.path import commonprefix
+from typing import Dict, List, Optional, Tuple
+
+# "No alias" value in the id arrays
+_NONE = 0xFFFFFFFF
+# Shortest spoken key the contains pass accepts (shorter ones are too ambiguous)
+CONTAINS_MIN_LEN = 4
+
+
+class _Items(ItemsView):
+    def __iter__(self) -> Iterator[Tuple[str, str]]:
+        return self._mapping.iter_items()
+
+
+class AppCatalog(Mapping[str, str]):
+    """Compact, read-only alias -> command map (drop-in for the old dict).
+
+    - `_commands` holds each distinct command once; `_apps` maps every
+      alias id to its app id (an index in `_commands`);
+    - the keys live in one string, alias i being
+      `_blob[_offsets[i]:_offsets[i + 1]]`, instead of one str object each;
+    - `_table` is an array-backed open-addressing hash table of alias ids
+      (linear probing) for exact lookups, compared in place in `_blob`.
+    Iteration follows insertion order (the contains/fuzzy passes of
+    `_rank_app` rely on it). The first insertion of a key wins.
+
+    `first_contains()` answers the contains pass without scanning:
+    an Aho-Corasick automaton over the keys finds aliases inside the spoken
+    text, a sorted suffix array over `_blob` finds aliases containing it.
+    Both are built with the map and never change afterwards, so one catalog
+    can be shared by the voice loop and the API threads without locking.
+    """
+
+    __slots__ = (
+        "_commands",
+        "_apps",
+        "_blob",
+        "_offsets",
+        "_table",
+        "_mask",
+        "_child",
+        "_sibling",
+        "_sym",
+        "_fail",
+        "_out",
+        "_suffixes",
+    )
+
+    def __init__(self, pairs: Iterable[Tuple[str, str]] = ()) -> None:
+        keys: List[str] = []
+        self._commands: List[str] = []
+        self._apps = array("I")
+        app_ids: Dict[str, int] = {}
+        seen = set()
+        for key, command in pairs:
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            keys.append(key)
+            app_id = app_ids.get(command)
+            if app_id is None:
+                app_id = app_ids[command] = len(self._commands)
+                self._commands.append(command)
+            self._apps.append(app_id)
+        del seen, app_ids
+
+        self._blob = "".join(keys)
+        self._offsets = array("I", accumulate(map(len, keys), initial=0))
+
+        # Load factor <= 3/4
+        size = 8
+        while 3 * size < 4 * len(keys):
+            size *= 2
+        self._mask = size - 1
+        self._table = array("I", [_NONE]) * size
+        for alias_id, key in enumerate(keys):
+            slot = hash(key) & self._mask
+            while self._table[slot] != _NONE:
+                slot = (slot + 1) & self._mask
+            self._table[slot] = alias_id
+
+        self._build_index()
+
+    def __reduce__(self) -> Tuple[type, Tuple[List[Tuple[str, str]]]]:
+        # hash() is salted per process: rebuild instead of copying _table
+        return AppCatalog, (list(self.iter_items()),)
+
+    # Mapping interface
+
+    def __getitem__(self, key: str) -> str:
+        alias_id = self.alias_id(key)
+        if alias_id is None:
+            raise KeyError(key)
+        return self._commands[self._apps[alias_id]]
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self.alias_id(key) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        offsets = self._offsets
+        return map(self._blob.__getitem__, map(slice, offsets, islice(offsets, 1, None)))
+
+    def __len__(self) -> int:
+        return len(self._apps)
+
+    def items(self) -> _Items:
+        return _Items(self)
+
+    def iter_items(self) -> Iterator[Tuple[str, str]]:
+        return zip(iter(self), map(self._commands.__getitem__, self._apps))
+
+    # Ids
+
+    def key(self, alias_id: int) -> str:
+        return self._blob[self._offsets[alias_id] : self._offsets[alias_id + 1]]
+
+    def command(self, alias_id: int) -> str:
+        return self._commands[self._apps[alias_id]]
+
+    def alias_id(self, key: str) -> Optional[int]:
+        blob, offsets, table, mask = self._blob, self._offsets, self._table, self._mask
+        n = len(key)
+        slot = hash(key) & mask
+        while True:
+            alias_id = table[slot]
+            if alias_id == _NONE:
+                return None
+            start = offsets[alias_id]
+            if offsets[alias_id + 1] - start == n and blob.startswith(key, start):
+                return alias_id
+            slot = (slot + 1) & mask
+
+    # Substring index
+
+    def first_contains(self, spoken: str) -> Optional[int]:
+        """Smallest alias id whose key is in `spoken` or contains it.
+
+        Same answer as the first hit of a scan in insertion order, in time
+        linear in len(spoken) plus the number of aliases containing it.
+        Spoken text shorter than CONTAINS_MIN_LEN never matches.
+        """
+        if len(spoken) < CONTAINS_MIN_LEN:
+            return None
+        best = min(self._scan(spoken), self._containing(spoken))
+        return None if best == _NONE else best
+
+    def _build_index(self) -> None:
+        self._build_trie()
+        self._link()
+        self._sort_suffixes()
+
+    def _step(self, node: int, code: int) -> int:
+        """Child of `node` on char `code`, 0 if none."""
+        child, sym, sibling = self._child, self._sym, self._sibling
+        c = child[node]
+        while c and sym[c] != code:
+            c = sibling[c]
+        return c
+
+    def _build_trie(self) -> None:
+        """Trie (node 0 = root, never a child) as first child / next sibling lists.
+
+        Keys are inserted in sorted order, so each one only adds the nodes
+        past its common prefix with the previous key (no sibling search);
+        _out starts as the alias id ending at each node.
+        """
+        top = ord(max(self._blob, default="\0"))
+        sym = array("B" if top < 0x100 else "H" if top < 0x10000 else "I", [0])
+        child, sibling, out = array("I", [0]), array("I", [0]), array("I", [_NONE])
+        keys = list(self)
+        path = [0]  # path[d]: node of the previous key at depth d
+        previous = ""
+        for alias_id in sorted(range(len(keys)), key=keys.__getitem__):
+            key = keys[alias_id]
+            common = len(commonprefix((previous, key)))
+            del path[common + 1 :]
+            node = path[-1]
+            for ch in key[common:]:
+                c = len(sym)
+                child.append(0)
+                sibling.append(child[node])
+                child[node] = c
+                sym.append(ord(ch))
+                out.append(_NONE)
+                path.append(c)
+                node = c
+            out[node] = alias_id
+            previous = key
+        self._child, self._sibling, self._sym, self._out = child, sibling, sym, out
+
+    def _link(self) -> None:
+        """Failure links breadth-first; _out becomes the min alias id on each output chain."""
+        child, sibling, sym, out, step = self._child, self._sibling, self._sym, self._out, self._step
+        fail = array("I", [0]) * len(sym)
+        queue: deque[int] = deque()
+        c = child[0]
+        while c:
+            queue.append(c)
+            c = sibling[c]
+        while queue:
+            node = queue.popleft()
+            c = child[node]
+            while c:
+                f = fail[node]
+                while True:
+                    nxt = step(f, sym[c])
+                    if nxt or f == 0:
+                        break
+                    f = fail[f]
+                fail[c] = nxt
+                if out[nxt] < out[c]:
+                    out[c] = out[nxt]
+                queue.append(c)
+                c = sibling[c]
+        self._fail = fail
+
+    def _scan(self, spoken: str) -> int:
+        """Aho-Corasick pass: smallest alias id occurring inside `spoken`."""
+        step, fail, out = self._step, self._fail, self._out
+        node, best = 0, _NONE
+        for ch in spoken:
+            code = ord(ch)
+            while True:
+                nxt = step(node, code)
+                if nxt:
+                    node = nxt
+                    break
+                if node == 0:
+                    break
+                node = fail[node]
+            if out[node] < best:
+                best = out[node]
+        return best
+
+    def _suffix_end(self, pos: int) -> int:
+        return self._offsets[bisect_right(self._offsets, pos)]
+
+    def _suffix_bound(self, text: str, *, upper: bool) -> int:
+        """First suffix whose len(text)-prefix is >= text (> text if `upper`)."""
+        blob, suffixes, n = self._blob, self._suffixes, len(text)
+        lo, hi = 0, len(suffixes)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            pos = suffixes[mid]
+            head = blob[pos : min(pos + n, self._suffix_end(pos))]
+            if head < text or (upper and head == text):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _containing(self, spoken: str) -> int:
+        """Suffix-array pass: smallest alias id whose key contains `spoken`."""
+        lo = self._suffix_bound(spoken, upper=False)
+        hi = self._suffix_bound(spoken, upper=True)
+        if lo == hi:
+            return _NONE
+        # Blob positions follow alias ids: the smallest position wins
+        return bisect_right(self._offsets, min(self._suffixes[lo:hi])) - 1
+
+    def _sort_suffixes(self) -> None:
+        """Sort the blob positions by suffix, one first-char bucket at a time.
+
+        Only suffixes long enough to contain a query are kept, and among
+        identical suffixes only the first position (smallest alias id).
+        Sorting per bucket keeps only one bucket's suffix strings alive.
+        """
+        blob, offsets = self._blob, self._offsets
+        starts: Dict[str, array] = {}
+        ends: Dict[str, array] = {}
+        for alias_id, key in enumerate(self):
+            # From a word that is an earlier alias on, the suffixes repeat
+            # that alias' ones, which sit at smaller positions: skip them
+            stop = len(key) - CONTAINS_MIN_LEN + 1
+            space = key.find(" ")
+            while space != -1 and space + 1 < stop:
+                other = self.alias_id(key[space + 1 :])
+                if other is not None and other < alias_id:
+                    stop = space + 1
+                    break
+                space = key.find(" ", space + 1)
+            start = offsets[alias_id]
+            end = start + len(key)
+            for pos in range(start, start + stop):
+                head = blob[pos]
+                bucket = starts.get(head)
+                if bucket is None:
+                    bucket = starts[head] = array("I")
+                    ends[head] = array("I")
+                bucket.append(pos)
+                ends[head].append(end)
+        suffixes = array("I")
+        for head in sorted(starts):
+            positions = starts.pop(head)
+            texts = list(map(blob.__getitem__, map(slice, positions, ends.pop(head))))
+            # Stable sort: identical suffixes stay in position order
+            previous = None
+            for i in sorted(range(len(texts)), key=texts.__getitem__):
+                if texts[i] != previous:
+                    suffixes.append(positions[i])
+                    previous = texts[i]
+        self._suffixes = suffixes
+
+
+def _bench(n_apps: int = 3000, rounds: int = 5) -> None:
+    """Memory and lookup time of AppCatalog vs the plain dict on a synthetic catalog."""
+    import gc
+    import random
+    import time
+    import tracemalloc
+
+    # The class as intents sees it (this file may run as __main__)
+    from catalog import AppCatalog
+    from intents import _generate_app_aliases, _rank_app
+
+    words = ["studio", "code", "prusa", "slicer", "brave", "browser", "spotify", "client", "office", "launcher"]
+    rng = random.Random(0)
+    pairs: List[Tuple[str, str]] = []
+    seen = set()
+    for i in range(n_apps):
+        name = f"{rng.choice(words)} {rng.choice(words)} app{i}"
+        cmd = f"/usr/bin/{name.replace(' ', '-')} --flag"
+        for alias in [name, *sorted(_generate_app_aliases(name))]:
+            if alias not in seen:
+                seen.add(alias)
+                pairs.append((alias, cmd))
+    commands = [c for _, c in pairs]
+
+    def measure(build):  # noqa: ANN001, ANN202
+        gc.collect()
+        tracemalloc.start()
+        obj = build()
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return obj, size
+
+    # Build from fresh strings so both sides pay for their own keys
+    as_dict, dict_bytes = measure(lambda: {"".join(k): str(commands[i]) for i, (k, _) in enumerate(pairs)})
+    catalog, catalog_bytes = measure(lambda: AppCatalog(("".join(k), c) for k, c in pairs))
+    index_bytes = sum(
+        getattr(catalog, name).buffer_info()[1] * getattr(catalog, name).itemsize
+        for name in ("_child", "_sibling", "_sym", "_fail", "_out", "_suffixes")
+    )
+    t0 = time.perf_counter()
+    dict(pairs)
+    dict_build_ms = (time.perf_counter() - t0) * 1000.0
+    t0 = time.perf_counter()
+    AppCatalog(pairs)
+    catalog_build_ms = (time.perf_counter() - t0) * 1000.0
+    print(f"{len(pairs)} alias / {n_apps} apps")
+    print(f"construction: dict {dict_build_ms:.1f} ms, catalogue (avec index) {catalog_build_ms:.1f} ms")
+    print(
+        f"mémoire: dict {dict_bytes / 1e6:.2f} Mo, catalogue {catalog_bytes / 1e6:.2f} Mo "
+        f"({catalog_bytes / dict_bytes:.0%}, dont index contains {index_bytes / 1e6:.2f} Mo)"
+    )
+
+    probes = [k for k, _ in rng.sample(pairs, 2000)] + [f"absent {i}" for i in range(2000)]
+    for label, apps in (("dict", as_dict), ("catalogue", catalog)):
+        t0 = time.perf_counter()
+        for _ in range(rounds):
+            for k in probes:
+                _ = k in apps and apps[k]
+        lookup_us = (time.perf_counter() - t0) / (rounds * len(probes)) * 1e6
+        t0 = time.perf_counter()
+        for _ in range(rounds):
+            for _ in apps.items():
+                pass
+        scan_ms = (time.perf_counter() - t0) / rounds * 1000.0
+        # Only the last app contains this key: the contains pass scans everything
+        t0 = time.perf_counter()
+        for _ in range(rounds):
+            _rank_app(f"app{n_apps - 1}", apps)
+        rank_ms = (time.perf_counter() - t0) / rounds * 1000.0
+        print(f"{label:9}: lookup {lookup_us:.2f} µs, parcours items {scan_ms:.1f} ms, _rank_app (contains) {rank_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    _bench()
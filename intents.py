@@ -7,14 +7,25 @@ import unicodedata
 from dataclasses import dataclass
 from difflib import SequenceMatcher
 from itertools import product
-from typing import Any, Dict, Optional
-
-from actions import ExecResult, close_app, hypr_exec, hypr_maximize_active_with_command, hypr_workspace, safe_delete
+from pathlib import Path
+from typing import Any, Dict, Iterator, Mapping, Optional
+
+from actions import (
+    ExecResult,
+    Trash,
+    close_app,
+    delete_refusal,
+    hypr_exec,
+    hypr_maximize_active_with_command,
+    hypr_workspace,
+    safe_delete,
+)
+from catalog import CONTAINS_MIN_LEN, AppCatalog
 
 
 @dataclass
 class IntentContext:
-    apps: Dict[str, str]
+    apps: Mapping[str, str]
     delete_base_dir: str
     delete_aliases: Dict[str, str]
     cooldown_ms: int = 800
@@ -22,6 +33,8 @@ class IntentContext:
     app_short_threshold: float = 0.90
     app_min_len: int = 4
     maximize_command: str = ""
+    # Deferred, undoable deletion (None = delete synchronously)
+    trash: Optional[Trash] = None
     _last_action_ts: float = 0.0
 
     def cooldown_ok(self) -> bool:
@@ -52,6 +65,11 @@ _DELETE_PATTERNS = [
     re.compile(r"^(?:supprime|efface|delete)\s+(?P<alias>.+)$"),
 ]
 
+_UNDO_PATTERNS = [
+    # FR + EN
+    re.compile(r"^(?:annule|restaure|undo|restore)(?:\s+(?:la\s+)?(?:suppression|delete))?$"),
+]
+
 _CLOSE_PATTERNS = [
     # FR + EN verbs
     re.compile(r"^(?:ferme|quitte|arrete|stop|close|quit|exit|kill)\s+(?P<app>.+)$"),
@@ -99,12 +117,13 @@ def build_apps_map(
     apps_cfg: Dict[str, str],
     *,
     app_aliases: Optional[Dict[str, list[str]]] = None,
-) -> Dict[str, str]:
+) -> AppCatalog:
     """Build a normalized app map with many aliases.
 
     Goal: tolerate typical Vosk mis-hearings in FR, plus some EN words.
     - Never overwrites explicit user keys.
     - Generates many extra keys (aliases) per app.
+    The result is a compact AppCatalog (one command string per app).
     """
     explicit: Dict[str, str] = {}
     for name, cmd in apps_cfg.items():
@@ -112,21 +131,21 @@ def build_apps_map(
         if key:
             explicit[key] = str(cmd)
 
-    expanded: Dict[str, str] = dict(explicit)
-    for canonical_name, cmd in explicit.items():
-        for alias in _generate_app_aliases(canonical_name):
-            if alias and alias not in expanded:
-                expanded[alias] = cmd
+    def expanded() -> Iterator[tuple[str, str]]:
+        # Explicit keys first; AppCatalog keeps the first insertion of a key
+        yield from explicit.items()
+        for canonical_name, cmd in explicit.items():
+            for alias in _generate_app_aliases(canonical_name):
+                yield alias, cmd
+
+            # Config-provided aliases/typos for this app
+            if app_aliases:
+                raw_list = app_aliases.get(canonical_name) or app_aliases.get(canonical_name.replace(" ", ""))
+                if raw_list:
+                    for raw_alias in raw_list:
+                        yield normalize_text(str(raw_alias)), cmd
 
-        # Config-provided aliases/typos for this app
-        if app_aliases:
-            raw_list = app_aliases.get(canonical_name) or app_aliases.get(canonical_name.replace(" ", ""))
-            if raw_list:
-                for raw_alias in raw_list:
-                    alias = normalize_text(str(raw_alias))
-                    if alias and alias not in expanded:
-                        expanded[alias] = cmd
-    return expanded
+    return AppCatalog(expanded())
 
 
 def _plural_toggle(token: str) -> set[str]:
@@ -210,68 +229,52 @@ def _generate_app_aliases(canonical_key: str) -> set[str]:
     return {v for v in normalized if v}
 
 
-def match_intent(raw_text: str, ctx: IntentContext) -> Optional[ExecResult]:
+@dataclass(frozen=True)
+class Intent:
+    """A parsed command, before any side effect.
+
+    `kind` is one of: open, close, workspace, maximize, delete, undo, help.
+    `error` is set when the command was recognized but cannot be resolved
+    (unknown app, bad workspace number...).
+    """
+
+    kind: str
+    text: str
+    app_spoken: str = ""
+    app: Optional[ResolvedApp] = None
+    number: Optional[int] = None
+    target: str = ""
+    error: str = ""
+
+
+_HELP_MESSAGE = (
+    "Commandes: 'ouvre <app>' | 'ferme <app>' | 'va au bureau <n>' | 'maximise la fenetre' | 'supprime <alias>'"
+    " | 'annule'"
+)
+
+
+def parse_intent(raw_text: str, ctx: IntentContext) -> Optional[Intent]:
+    """Match `raw_text` against the command patterns without executing anything."""
     text = normalize_text(raw_text)
     if not text:
         return None
 
-    # OPEN
-    for pat in _OPEN_PATTERNS:
-        m = pat.match(text)
-        if m:
-            app_spoken = m.group("app").strip()
-            resolved = _resolve_app(
-                app_spoken,
-                ctx.apps,
-                threshold=ctx.app_match_threshold,
-                short_threshold=ctx.app_short_threshold,
-                min_len=ctx.app_min_len,
-            )
-            if resolved is None:
-                return ExecResult(False, f"App inconnue: {app_spoken}")
-            if not ctx.cooldown_ok():
-                return ExecResult(True, "(cooldown)")
-            result = hypr_exec(resolved.command)
-            if not resolved.exact and result.ok:
-                return ExecResult(
-                    True,
-                    f"{result.message} (deviné: '{app_spoken}' -> '{resolved.name}', score={resolved.score:.2f})",
-                )
-            if not resolved.exact and not result.ok:
-                return ExecResult(
-                    False,
-                    f"{result.message} (tenté: '{app_spoken}' -> '{resolved.name}', score={resolved.score:.2f})",
+    # OPEN / CLOSE
+    for kind, patterns in (("open", _OPEN_PATTERNS), ("close", _CLOSE_PATTERNS)):
+        for pat in patterns:
+            m = pat.match(text)
+            if m:
+                app_spoken = m.group("app").strip()
+                resolved = _resolve_app(
+                    app_spoken,
+                    ctx.apps,
+                    threshold=ctx.app_match_threshold,
+                    short_threshold=ctx.app_short_threshold,
+                    min_len=ctx.app_min_len,
                 )
-            return result
-
-    # CLOSE
-    for pat in _CLOSE_PATTERNS:
-        m = pat.match(text)
-        if m:
-            app_spoken = m.group("app").strip()
-            resolved = _resolve_app(
-                app_spoken,
-                ctx.apps,
-                threshold=ctx.app_match_threshold,
-                short_threshold=ctx.app_short_threshold,
-                min_len=ctx.app_min_len,
-            )
-            if resolved is None:
-                return ExecResult(False, f"App inconnue: {app_spoken}")
-            if not ctx.cooldown_ok():
-                return ExecResult(True, "(cooldown)")
-            result = close_app(resolved.command)
-            if not resolved.exact and result.ok:
-                return ExecResult(
-                    True,
-                    f"{result.message} (deviné: '{app_spoken}' -> '{resolved.name}', score={resolved.score:.2f})",
-                )
-            if not resolved.exact and not result.ok:
-                return ExecResult(
-                    False,
-                    f"{result.message} (tenté: '{app_spoken}' -> '{resolved.name}', score={resolved.score:.2f})",
-                )
-            return result
+                if resolved is None:
+                    return Intent(kind, text, app_spoken=app_spoken, error=f"App inconnue: {app_spoken}")
+                return Intent(kind, text, app_spoken=app_spoken, app=resolved)
 
     # WORKSPACE
     for pat in _WORKSPACE_PATTERNS:
@@ -280,17 +283,13 @@ def match_intent(raw_text: str, ctx: IntentContext) -> Optional[ExecResult]:
             num_raw = (m.group("num") or "").strip()
             number = _parse_number(num_raw)
             if number is None:
-                return ExecResult(False, f"Numéro de bureau invalide: {num_raw}")
-            if not ctx.cooldown_ok():
-                return ExecResult(True, "(cooldown)")
-            return hypr_workspace(number)
+                return Intent("workspace", text, error=f"Numéro de bureau invalide: {num_raw}")
+            return Intent("workspace", text, number=number)
 
     # MAXIMIZE
     for pat in _MAXIMIZE_PATTERNS:
         if pat.match(text):
-            if not ctx.cooldown_ok():
-                return ExecResult(True, "(cooldown)")
-            return hypr_maximize_active_with_command(ctx.maximize_command)
+            return Intent("maximize", text)
 
     # DELETE (alias-based)
     for pat in _DELETE_PATTERNS:
@@ -299,19 +298,100 @@ def match_intent(raw_text: str, ctx: IntentContext) -> Optional[ExecResult]:
             alias = m.group("alias").strip()
             target = _resolve_delete_alias(alias, ctx.delete_aliases)
             if not target:
-                return ExecResult(False, f"Alias suppression inconnu: {alias}")
-            if not ctx.cooldown_ok():
-                return ExecResult(True, "(cooldown)")
-            return safe_delete(target=target, base_dir=ctx.delete_base_dir)
+                return Intent("delete", text, error=f"Alias suppression inconnu: {alias}")
+            return Intent("delete", text, target=target)
+
+    # UNDO (last deletion)
+    for pat in _UNDO_PATTERNS:
+        if pat.match(text):
+            return Intent("undo", text)
 
     # Optional: show config keys
     if text in {"aide", "help"}:
+        return Intent("help", text)
+
+    return None
+
+
+def execute_intent(intent: Intent, ctx: IntentContext) -> ExecResult:
+    """Run the action for a parsed intent (no cooldown check)."""
+    if intent.error:
+        return ExecResult(False, intent.error)
+
+    if intent.kind in {"open", "close"} and intent.app is not None:
+        resolved = intent.app
+        if intent.kind == "open":
+            result = hypr_exec(resolved.command)
+        else:
+            result = close_app(resolved.command)
+        if not resolved.exact and result.ok:
+            return ExecResult(
+                True,
+                f"{result.message} (deviné: '{intent.app_spoken}' -> '{resolved.name}', score={resolved.score:.2f})",
+            )
+        if not resolved.exact and not result.ok:
+            return ExecResult(
+                False,
+                f"{result.message} (tenté: '{intent.app_spoken}' -> '{resolved.name}', score={resolved.score:.2f})",
+            )
+        return result
+
+    if intent.kind == "workspace" and intent.number is not None:
+        return hypr_workspace(intent.number)
+
+    if intent.kind == "maximize":
+        return hypr_maximize_active_with_command(ctx.maximize_command)
+
+    if intent.kind == "delete":
+        return safe_delete(target=intent.target, base_dir=ctx.delete_base_dir, trash=ctx.trash)
+
+    if intent.kind == "undo":
+        if ctx.trash is None:
+            return ExecResult(False, "Annulation indisponible (corbeille désactivée)")
+        return ctx.trash.undo()
+
+    if intent.kind == "help":
+        return ExecResult(True, _HELP_MESSAGE)
+
+    return ExecResult(False, f"Intent non géré: {intent.kind}")
+
+
+def preview_intent(intent: Intent, ctx: IntentContext) -> ExecResult:
+    """Describe what `execute_intent` would do (dry-run), with its refusals."""
+    if intent.error:
+        return ExecResult(False, intent.error)
+    if intent.app is not None:
         return ExecResult(
             True,
-            "Commandes: 'ouvre <app>' | 'ferme <app>' | 'va au bureau <n>' | 'maximise la fenetre' | 'supprime <alias>'",
+            f"(dry-run) {intent.kind}: '{intent.app_spoken}' -> '{intent.app.name}' "
+            f"[{intent.app.command}] score={intent.app.score:.2f}",
         )
+    if intent.kind == "workspace":
+        return ExecResult(True, f"(dry-run) workspace: {intent.number}")
+    if intent.kind == "delete":
+        refusal = delete_refusal(intent.target, ctx.delete_base_dir, ctx.trash)
+        return refusal or ExecResult(True, f"(dry-run) delete: {intent.target}")
+    if intent.kind == "help":
+        return ExecResult(True, _HELP_MESSAGE)
+    return ExecResult(True, f"(dry-run) {intent.kind}")
+
+
+def match_intent(raw_text: str, ctx: IntentContext, *, dry_run: bool = False) -> Optional[ExecResult]:
+    intent = parse_intent(raw_text, ctx)
+    if intent is None:
+        return None
+    return run_intent(intent, ctx, dry_run=dry_run)
 
-    return None
+
+def run_intent(intent: Intent, ctx: IntentContext, *, dry_run: bool = False) -> ExecResult:
+    """Execute (or preview) an already parsed intent, applying the cooldown."""
+    if intent.error:
+        return ExecResult(False, intent.error)
+    if dry_run:
+        return preview_intent(intent, ctx)
+    if intent.kind != "help" and not ctx.cooldown_ok():
+        return ExecResult(True, "(cooldown)")
+    return execute_intent(intent, ctx)
 
 
 def _token_set(text: str) -> set[str]:
@@ -493,39 +573,53 @@ def _app_match_score(spoken_key: str, app_key: str) -> float:
     return max(base, combined, char_sim)
 
 
-def _resolve_app(
-    app_spoken: str,
-    apps: Dict[str, str],
-    *,
-    threshold: float = 0.72,
-    short_threshold: float = 0.90,
-    min_len: int = 4,
-) -> Optional[ResolvedApp]:
+def _rank_app(app_spoken: str, apps: Mapping[str, str]) -> Optional[tuple[ResolvedApp, int, bool]]:
+    """Best app candidate for `app_spoken`, before any threshold.
+
+    Returns (candidate, spoken length used by the short-input guard, fuzzy).
+    Exact and contains matches are final; thresholds only apply to fuzzy ones.
+    """
     key = normalize_text(app_spoken)
     if not key:
         return None
 
     key_clean = _strip_fillers(key)
+    spoken_len = len(key_clean or key)
     spoken_candidates = [key]
     if key_clean and key_clean != key:
         spoken_candidates.append(key_clean)
 
     for spoken_key in spoken_candidates:
         if spoken_key in apps:
-            return ResolvedApp(
-                name=spoken_key,
-                command=apps[spoken_key],
-                score=1.0,
-                exact=(spoken_key == key),
+            return (
+                ResolvedApp(
+                    name=spoken_key,
+                    command=apps[spoken_key],
+                    score=1.0,
+                    exact=(spoken_key == key),
+                ),
+                spoken_len,
+                False,
             )
 
-    # Match by contains first (cheap + usually safe)
-    for spoken_key in spoken_candidates:
-        for name, cmd in apps.items():
-            if spoken_key == name or (len(spoken_key) >= 4 and (spoken_key in name or name in spoken_key)):
-                return ResolvedApp(name=name, command=cmd, score=0.90, exact=False)
+    # Match by contains first (cheap + usually safe); the first alias in
+    # insertion order wins. AppCatalog answers it from its substring index.
+    if isinstance(apps, AppCatalog):
+        for spoken_key in spoken_candidates:
+            alias_id = apps.first_contains(spoken_key)
+            if alias_id is not None:
+                return (
+                    ResolvedApp(name=apps.key(alias_id), command=apps.command(alias_id), score=0.90, exact=False),
+                    spoken_len,
+                    False,
+                )
+    else:
+        for spoken_key in spoken_candidates:
+            for name, cmd in apps.items():
+                if spoken_key == name or (len(spoken_key) >= CONTAINS_MIN_LEN and (spoken_key in name or name in spoken_key)):
+                    return ResolvedApp(name=name, command=cmd, score=0.90, exact=False), spoken_len, False
 
-    # Fuzzy: pick best match above threshold
+    # Fuzzy: pick best match
     best: Optional[ResolvedApp] = None
     for spoken_key in spoken_candidates:
         for name, cmd in apps.items():
@@ -535,13 +629,38 @@ def _resolve_app(
 
     if best is None:
         return None
+    return best, spoken_len, True
+
 
+def _accept_app(
+    best: ResolvedApp,
+    spoken_len: int,
+    *,
+    threshold: float = 0.72,
+    short_threshold: float = 0.90,
+    min_len: int = 4,
+) -> bool:
     # Avoid accidental launches on extremely short inputs
-    if len(key_clean or key) < min_len and best.score < short_threshold:
-        return None
+    if spoken_len < min_len and best.score < short_threshold:
+        return False
 
     # Threshold avoids launching random apps on very weak matches
-    if best.score < threshold:
+    return best.score >= threshold
+
+
+def _resolve_app(
+    app_spoken: str,
+    apps: Mapping[str, str],
+    *,
+    threshold: float = 0.72,
+    short_threshold: float = 0.90,
+    min_len: int = 4,
+) -> Optional[ResolvedApp]:
+    ranked = _rank_app(app_spoken, apps)
+    if ranked is None:
+        return None
+    best, spoken_len, fuzzy = ranked
+    if fuzzy and not _accept_app(best, spoken_len, threshold=threshold, short_threshold=short_threshold, min_len=min_len):
         return None
     return best
 
@@ -560,3 +679,24 @@ def _resolve_delete_alias(alias_spoken: str, aliases: Dict[str, str]) -> Optiona
 def load_config(path: str) -> Dict[str, Any]:
     with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
+
+
+def context_from_config(cfg: Dict[str, Any]) -> IntentContext:
+    """Build the IntentContext (expanded app map, thresholds...) from a loaded config."""
+    app_aliases = cfg.get("app_aliases", {})
+    if not isinstance(app_aliases, dict):
+        app_aliases = {}
+
+    return IntentContext(
+        apps=build_apps_map(
+            {k: str(v) for k, v in cfg.get("apps", {}).items()},
+            app_aliases={str(k): list(v) if isinstance(v, list) else [] for k, v in app_aliases.items()},
+        ),
+        delete_base_dir=str(cfg.get("delete_base_dir", str(Path.home()))),
+        delete_aliases={normalize_text(k): v for k, v in cfg.get("delete_aliases", {}).items()},
+        cooldown_ms=int(cfg.get("cooldown_ms", 800)),
+        app_match_threshold=float(cfg.get("app_match_threshold", 0.72)),
+        app_short_threshold=float(cfg.get("app_short_threshold", 0.90)),
+        app_min_len=int(cfg.get("app_min_len", 4)),
+        maximize_command=str(cfg.get("maximize_command", "") or ""),
+    )
@@ -1,17 +1,24 @@
 from __future__ import annotations
 
 import argparse
-import json
-import queue
-import sys
+import signal
+import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
 
-import sounddevice as sd
-from vosk import KaldiRecognizer, Model
+from actions import ExecResult, Trash, push_notification
+from api import CommandServer
+from intents import IntentContext, context_from_config, load_config, normalize_text, parse_intent, run_intent
+from profiler import SamplingProfiler
+from startup import StartupTimer, sd_notify
 
-from actions import push_notification
-from intents import IntentContext, build_apps_map, load_config, match_intent, normalize_text
+if TYPE_CHECKING:
+    from streams import Utterance
+
+# Heavy modules (vosk, sounddevice, numpy) are imported where they are used,
+# so subcommands and the startup path only pay for what they need.
 
 
 def _print(msg: str) -> None:
@@ -19,14 +26,75 @@ def _print(msg: str) -> None:
 
 
 def main() -> int:
+    timer = StartupTimer()
     parser = argparse.ArgumentParser(description="Assistant vocal local (Vosk + Hyprland)")
     parser.add_argument(
         "--config",
         default="./config.json",
         help="Chemin config JSON (défaut: ./config.json)",
     )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Profile la boucle dès le démarrage (sinon: kill -USR1 <pid> pour activer/désactiver)",
+    )
+    parser.add_argument("--profile-out", default="./profiles", help="Dossier des profils (piles repliées)")
+    parser.add_argument("--profile-interval-ms", type=float, default=10.0, help="Période d'échantillonnage (ms)")
+    sub = parser.add_subparsers(dest="command")
+    p_batch = sub.add_parser(
+        "batch",
+        help="Transcrit un dossier de WAV/PCM et étiquette les intents (dry-run) en JSONL",
+    )
+    p_batch.add_argument("input", help="Dossier (ou fichier) .wav / .raw / .pcm")
+    p_batch.add_argument("--out", default="-", help="Fichier JSONL de sortie (défaut: stdout)")
+    p_batch.add_argument("--workers", type=int, default=None, help="Nombre de processus (défaut: nb de coeurs)")
+    p_tune = sub.add_parser(
+        "tune",
+        help="Cherche les meilleurs seuils app_* et le plus petit jeu d'app_aliases sur un corpus étiqueté",
+    )
+    p_tune.add_argument("corpus", help='JSONL: {"text": "<transcription Vosk>", "expected": "<app>" ou null}')
+    p_tune.add_argument("--thresholds", default="0.40:0.95:0.05", help="app_match_threshold (début:fin:pas ou liste)")
+    p_tune.add_argument("--short-thresholds", default="0.80:1.00:0.05", help="app_short_threshold")
+    p_tune.add_argument("--min-lens", default="2:6:1", help="app_min_len")
+    p_tune.add_argument("--workers", type=int, default=None, help="Nombre de processus (défaut: nb de coeurs)")
+    p_tune.add_argument("--top", type=int, default=10, help="Nombre de réglages affichés")
+    p_tune.add_argument("--no-minimize", action="store_true", help="Ne pas chercher à réduire app_aliases")
+    p_tune.add_argument("--aliases-out", default=None, help="Écrit les app_aliases suggérés dans ce fichier")
+    p_extract = sub.add_parser(
+        "extract",
+        help="Liste / exporte en WAV les énoncés d'un enregistrement (recorder_path)",
+    )
+    p_extract.add_argument("recording", help="Fichier d'enregistrement circulaire")
+    p_extract.add_argument("--index", type=int, default=None, help="Numéro d'énoncé à exporter")
+    p_extract.add_argument("--last", action="store_true", help="Exporte le dernier énoncé")
+    p_extract.add_argument("--out", default=None, help="Fichier WAV de sortie")
+    p_extract.add_argument("--out-dir", default=None, help="Exporte tous les énoncés dans ce dossier")
+    p_extract.add_argument("--pad-ms", type=int, default=0, help="Marge audio avant/après (ms)")
+    p_send = sub.add_parser(
+        "send",
+        help="Envoie des commandes texte à l'assistant en cours (socket api_socket), sans passer par le micro",
+    )
+    p_send.add_argument("commands", nargs="*", help='Commandes, ex: "ouvre firefox" "va au bureau 2"')
+    p_send.add_argument("--stdin", action="store_true", help="Lit aussi une commande par ligne sur stdin")
+    p_send.add_argument("--socket", default=None, help="Chemin du socket (défaut: api_socket de la config)")
+    p_send.add_argument("--dry-run", action="store_true", help="Analyse sans exécuter")
+    p_send.add_argument("--json", action="store_true", help="Affiche la réponse JSON brute")
+    p_serve = sub.add_parser("serve", help="Sert uniquement l'API texte (sans modèle ni micro)")
+    p_serve.add_argument("--socket", default=None, help="Chemin du socket (défaut: api_socket de la config)")
     args = parser.parse_args()
 
+    if args.command == "extract":
+        from recorder import run_extract
+
+        return run_extract(
+            args.recording,
+            index=args.index,
+            last=args.last,
+            out=args.out,
+            out_dir=args.out_dir,
+            pad_ms=args.pad_ms,
+        )
+
     cfg_path = Path(args.config)
     if not cfg_path.exists():
         _print(f"Config introuvable: {cfg_path}\nCopie config.example.json -> config.json")
@@ -34,101 +102,320 @@ def main() -> int:
 
     cfg = load_config(str(cfg_path))
 
+    if args.command == "send":
+        from api import run_send
+
+        return run_send(
+            args.socket or str(cfg.get("api_socket", "") or ""),
+            args.commands,
+            read_stdin=args.stdin,
+            dry_run=args.dry_run,
+            as_json=args.json,
+        )
+
+    if args.command == "tune":
+        from tune import run_tune
+
+        return run_tune(
+            cfg,
+            args.corpus,
+            thresholds=args.thresholds,
+            short_thresholds=args.short_thresholds,
+            min_lens=args.min_lens,
+            workers=args.workers,
+            top=args.top,
+            minimize=not args.no_minimize,
+            aliases_out=args.aliases_out,
+        )
+
+    if args.command == "serve":
+        profiler = _setup_profiler(args)
+        try:
+            return _serve(cfg, args.socket or str(cfg.get("api_socket", "") or ""), profiler)
+        finally:
+            if profiler.running:
+                _stop_profiler(profiler)
+
     model_path = Path(cfg["vosk_model_path"]).expanduser()
     if not model_path.exists():
         _print(f"Modèle Vosk introuvable: {model_path}")
         return 3
 
-    sample_rate = int(cfg.get("sample_rate", 16000))
-    device = cfg.get("device", None)
+    if args.command == "batch":
+        from batch import run_batch
 
-    wake_word = normalize_text(str(cfg.get("wake_word", "assistant")))
-    require_wake_word = bool(cfg.get("require_wake_word", False))
+        return run_batch(cfg, args.input, out_path=args.out, workers=args.workers)
+
+    profiler = _setup_profiler(args)
+    timer.mark("config")
+    try:
+        return _listen(cfg, model_path, timer, profiler)
+    finally:
+        if profiler.running:
+            _stop_profiler(profiler)
+
+
+def _setup_profiler(args: argparse.Namespace) -> SamplingProfiler:
+    """Sampling profiler: on with --profile, toggled at runtime by SIGUSR1."""
+    profiler = SamplingProfiler(args.profile_out, interval_s=args.profile_interval_ms / 1000.0)
+
+    def toggle(signum: int, frame: Any) -> None:  # noqa: ANN401
+        # Only hand off: stopping joins the sampler, writes a file and prints,
+        # none of which may run inside a signal handler (e.g. during a _print)
+        threading.Thread(target=_toggle_profiler, args=(profiler,), name="profiler-toggle", daemon=True).start()
+
+    signal.signal(signal.SIGUSR1, toggle)
+    if args.profile:
+        profiler.start()
+    return profiler
+
+
+def _stop_profiler(profiler: SamplingProfiler) -> None:
+    _report_profile(profiler.stop(), profiler)
+
+
+def _report_profile(path: Optional[Path], profiler: SamplingProfiler) -> None:
+    if path is not None:
+        _print(profiler.summary())
+        _print(f"Profil écrit: {path} (flamegraph.pl / speedscope)")
+
+
+def _toggle_profiler(profiler: SamplingProfiler) -> Dict[str, Any]:
+    """Start or stop the profiler (SIGUSR1 and the API "profile" op)."""
+    path = profiler.toggle()
+    if path is None:
+        _print("(profil démarré)")
+        return {"profiling": True}
+    _report_profile(path, profiler)
+    return {"profiling": False, "path": str(path), "summary": profiler.summary()}
+
+
+def _load_model(model_path: Path) -> Any:
+    from vosk import Model
+
+    return Model(str(model_path))
+
+
+def _make_context(cfg: Dict[str, Any]) -> IntentContext:
+    ctx = context_from_config(cfg)
+    if not bool(cfg.get("delete_use_trash", True)):
+        return ctx
 
     notifications_enabled = bool(cfg.get("notifications_enabled", True))
     notification_timeout_ms = int(cfg.get("notification_timeout_ms", 2500))
 
-    maximize_command = str(cfg.get("maximize_command", "") or "")
-    app_aliases = cfg.get("app_aliases", {})
-    if not isinstance(app_aliases, dict):
-        app_aliases = {}
-
-    ctx = IntentContext(
-        apps=build_apps_map(
-            {k: str(v) for k, v in cfg.get("apps", {}).items()},
-            app_aliases={str(k): list(v) if isinstance(v, list) else [] for k, v in app_aliases.items()},
-        ),
-        delete_base_dir=str(cfg.get("delete_base_dir", str(Path.home()))),
-        delete_aliases={normalize_text(k): v for k, v in cfg.get("delete_aliases", {}).items()},
-        cooldown_ms=int(cfg.get("cooldown_ms", 800)),
-        app_match_threshold=float(cfg.get("app_match_threshold", 0.72)),
-        app_short_threshold=float(cfg.get("app_short_threshold", 0.90)),
-        app_min_len=int(cfg.get("app_min_len", 4)),
-        maximize_command=maximize_command,
+    def notify_purge(result: ExecResult) -> None:
+        _print(result.message)
+        if notifications_enabled:
+            push_notification(
+                title="Voice",
+                message=result.message,
+                ok=result.ok,
+                timeout_ms=notification_timeout_ms,
+            )
+
+    try:
+        ctx.trash = Trash(
+            ctx.delete_base_dir,
+            cfg.get("delete_trash_dir") or None,
+            undo_s=float(cfg.get("delete_undo_s", 30)),
+            notify=notify_purge,
+        )
+    except (OSError, ValueError) as exc:
+        _print(f"Corbeille indisponible, suppression directe: {exc}")
+    return ctx
+
+
+def _start_api(cfg: Dict[str, Any], socket_path: str, ctx: IntentContext, profiler: SamplingProfiler) -> Optional[CommandServer]:
+    """Text-command API on a Unix socket (disabled when api_socket is empty)."""
+    if not socket_path:
+        return None
+
+    def on_result(row: Dict[str, Any]) -> None:
+        _print(f"[api] {row['message']}")
+
+    def toggle_profile() -> Dict[str, Any]:
+        return _toggle_profiler(profiler)
+
+    api = CommandServer(
+        socket_path,
+        ctx,
+        workers=int(cfg.get("api_workers", 4)),
+        on_result=on_result,
+        ops={"profile": toggle_profile},
     )
+    try:
+        api.start()
+    except OSError as exc:
+        _print(f"API texte indisponible ({socket_path}): {exc}")
+        return None
+    _print(f"API texte: {api.path}")
+    return api
+
+
+def _serve(cfg: Dict[str, Any], socket_path: str, profiler: SamplingProfiler) -> int:
+    if not socket_path:
+        _print("Socket API non configuré ('api_socket' dans la config ou --socket)")
+        return 2
+    api = _start_api(cfg, socket_path, _make_context(cfg), profiler)
+    if api is None:
+        return 2
+    try:
+        while True:
+            signal.pause()
+    finally:
+        api.close()
+
 
+def _listen(cfg: Dict[str, Any], model_path: Path, timer: StartupTimer, profiler: SamplingProfiler) -> int:
+    from streams import EndpointConfig, SourceStartError, StreamManager, sources_from_config
+
+    # Validate the sources before anything starts threads or sockets
+    try:
+        sources = sources_from_config(cfg)
+    except (KeyError, ValueError) as exc:
+        _print(f"Sources audio invalides: {exc}")
+        return 2
+    multi = len(sources) > 1
+    timer.mark("sources")
+
+    # The model loads in the background (Vosk releases the GIL) while the
+    # app map is built and audio capture starts buffering.
     _print("Chargement modèle Vosk...")
-    model = Model(str(model_path))
-    rec = KaldiRecognizer(model, sample_rate)
+    loader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model-load")
+    model_t0 = time.perf_counter()
+    model_future: Future[Any] = loader.submit(_load_model, model_path)
+    loader.shutdown(wait=False)
 
-    audio_queue: queue.Queue[bytes] = queue.Queue()
+    wake_word = normalize_text(str(cfg.get("wake_word", "assistant")))
+    require_wake_word = bool(cfg.get("require_wake_word", False))
 
-    def callback(indata, frames, time_info, status):  # noqa: ANN001
-        if status:
-            # Avoid spamming
-            return
-        audio_queue.put(bytes(indata))
+    notifications_enabled = bool(cfg.get("notifications_enabled", True))
+    notification_timeout_ms = int(cfg.get("notification_timeout_ms", 2500))
+
+    ctx = _make_context(cfg)
+    timer.mark("contexte")
+
+    recorders: Dict[str, Any] = {}
+    recorder_path = str(cfg.get("recorder_path", "") or "")
+    if recorder_path:
+        from recorder import RingRecorder, recorder_path_for
+
+        for s in sources:
+            recorders[s.name] = RingRecorder(
+                recorder_path_for(recorder_path, s.name, multi),
+                capacity=int(float(cfg.get("recorder_size_mb", 64)) * 1024 * 1024),
+                sample_rate=s.sample_rate,
+                index_slots=int(cfg.get("recorder_index_slots", 4096)),
+            )
 
     _print("Écoute micro... (CTRL+C pour quitter)")
+    if multi:
+        _print("Sources: " + ", ".join(s.name for s in sources))
     if require_wake_word:
         _print(f"Wake word actif: '{wake_word}'")
 
-    listening_armed = not require_wake_word
-    last_wake_ts = 0.0
-
-    with sd.RawInputStream(
-        samplerate=sample_rate,
-        blocksize=8000,
-        device=device,
-        dtype="int16",
-        channels=1,
-        callback=callback,
-    ):
-        while True:
-            data = audio_queue.get()
-            if rec.AcceptWaveform(data):
-                result = json.loads(rec.Result())
-                text = (result.get("text") or "").strip()
-                if not text:
-                    continue
-
-                norm = normalize_text(text)
-
-                if require_wake_word:
-                    if not listening_armed:
-                        if wake_word in norm.split() or norm.endswith(wake_word):
-                            listening_armed = True
-                            last_wake_ts = time.monotonic()
-                            _print("(wake)")
-                        continue
-
-                    # Auto-disarm after 6s
-                    if time.monotonic() - last_wake_ts > 6.0:
-                        listening_armed = False
-                        continue
-
-                action = match_intent(text, ctx)
-                if action is not None and action.message != "(cooldown)":
-                    _print(action.message)
-                    if notifications_enabled:
-                        push_notification(
-                            title="Voice",
-                            message=action.message,
-                            ok=bool(action.ok),
-                            timeout_ms=notification_timeout_ms,
-                        )
-
-            # else: partials ignored for perf/simplicity
+    # Wake word state is tracked per source
+    listening_armed: Dict[str, bool] = {s.name: not require_wake_word for s in sources}
+    last_wake_ts: Dict[str, float] = {s.name: 0.0 for s in sources}
+
+    def handle(utt: Utterance) -> Tuple[Optional[str], Optional[ExecResult]]:
+        """Wake word gating + intent dispatch; returns (intent kind, result)."""
+        norm = normalize_text(utt.text)
+        prefix = f"[{utt.source}] " if multi else ""
+
+        if require_wake_word:
+            if not listening_armed[utt.source]:
+                if wake_word in norm.split() or norm.endswith(wake_word):
+                    listening_armed[utt.source] = True
+                    last_wake_ts[utt.source] = time.monotonic()
+                    _print(f"{prefix}(wake)")
+                    return "wake", None
+                return None, None
+
+            # Auto-disarm after 6s
+            if time.monotonic() - last_wake_ts[utt.source] > 6.0:
+                listening_armed[utt.source] = False
+                return None, None
+
+        intent = parse_intent(utt.text, ctx)
+        if intent is None:
+            return None, None
+        action = run_intent(intent, ctx)
+        if action.message != "(cooldown)":
+            _print(f"{prefix}{action.message}")
+            if notifications_enabled:
+                push_notification(
+                    title=f"Voice ({utt.source})" if multi else "Voice",
+                    message=action.message,
+                    ok=bool(action.ok),
+                    timeout_ms=notification_timeout_ms,
+                )
+        return intent.kind, action
+
+    # READY is reported once both the model (on_ready, any thread) and the
+    # main-thread startup phases are done, whichever finishes last
+    ready_lock = threading.Lock()
+    ready_pending = 2
+
+    def ready_step() -> None:
+        nonlocal ready_pending
+        with ready_lock:
+            ready_pending -= 1
+            if ready_pending:
+                return
+        summary = timer.summary()
+        _print(summary)
+        sd_notify(f"READY=1\nSTATUS={summary}")
+
+    def on_ready() -> None:
+        timer.add("modèle (arrière-plan)", (time.perf_counter() - model_t0) * 1000.0)
+        ready_step()
+
+    timer.mark("enregistreurs")
+    api = _start_api(cfg, str(cfg.get("api_socket", "") or ""), ctx, profiler)
+    timer.mark("api")
+    try:
+        with StreamManager(
+            model_future,
+            sources,
+            recorders=recorders,
+            endpoint=EndpointConfig.from_config(cfg),
+            stats_interval_s=float(cfg.get("stats_interval_s", 0) or 0),
+            on_ready=on_ready,
+        ) as manager:
+            timer.mark("audio")
+            ready_step()
+            while True:
+                utt = manager.results.get()
+                if utt is None:
+                    if manager.error is not None:
+                        _print(f"Erreur chargement modèle Vosk: {manager.error}")
+                        return 3
+                    # Every source ended (files / closed FIFOs)
+                    return 0
+
+                kind, action = handle(utt)
+                recorder = recorders.get(utt.source)
+                if recorder is not None:
+                    recorder.mark(
+                        utt.start,
+                        utt.end,
+                        {
+                            "source": utt.source,
+                            "text": utt.text,
+                            "intent": kind,
+                            "ok": action.ok if action is not None else None,
+                            "message": action.message if action is not None else None,
+                            "endpoint": utt.forced or "vosk",
+                        },
+                    )
+    except SourceStartError as exc:
+        _print(f"Source audio indisponible: {exc}")
+        return 2
+    finally:
+        if api is not None:
+            api.close()
 
 
 if __name__ == "__main__":
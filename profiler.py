@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from types import FrameType
+from typing import Dict, List, Optional, Tuple
+
+# Leaf frames of a thread that is just waiting for work (queue/lock/pool idle).
+# Their samples are dropped unless include_idle=True, so the output shows
+# where busy time goes. Subprocess waits are *not* idle: they stay visible.
+_IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+    ("socket.py", "accept"),
+}
+
+
+def _label(frame: FrameType) -> str:
+    code = frame.f_code
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({os.path.basename(code.co_filename)})"
+
+
+class SamplingProfiler:
+    """Low-overhead wall-clock sampler for all Python threads.
+
+    A daemon thread snapshots every thread's stack (`sys._current_frames`)
+    each `interval_s` and counts them as collapsed stacks
+    (`thread;outer;...;leaf count`), ready for flamegraph.pl / speedscope.
+    Vosk calls show up as their Python wrappers (`KaldiRecognizer.AcceptWaveform`...),
+    JSON parsing as `loads`, intent matching as `normalize_text`, `_rank_app`,
+    `_app_match_score`..., and action subprocess waits under `subprocess`.
+    """
+
+    def __init__(self, out_dir: str = "./profiles", *, interval_s: float = 0.01, include_idle: bool = False) -> None:
+        self.out_dir = Path(out_dir).expanduser()
+        self.interval_s = max(0.001, float(interval_s))
+        self.include_idle = include_idle
+        self._stacks: Counter[str] = Counter()
+        self._samples = 0
+        self._started_at = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._toggle_lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stacks = Counter()
+            self._samples = 0
+            self._started_at = time.time()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> Optional[Path]:
+        """Stop sampling and write the collapsed stacks; returns the file path."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+            if thread is None:
+                return None
+            self._stop.set()
+            thread.join()
+        return self.write()
+
+    def toggle(self) -> Optional[Path]:
+        """Start if stopped (returns None), else stop and return the written file."""
+        with self._toggle_lock:
+            if self.running:
+                return self.stop()
+            self.start()
+            return None
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        names: Dict[int, str] = {}
+        while not self._stop.wait(self.interval_s):
+            frames = sys._current_frames()
+            if any(tid not in names for tid in frames):
+                names = {t.ident: t.name for t in threading.enumerate() if t.ident is not None}
+            self._samples += 1
+            for tid, frame in frames.items():
+                if tid == me:
+                    continue
+                stack = self._collapse(frame)
+                if stack:
+                    self._stacks[f"{names.get(tid, str(tid))};{stack}"] += 1
+
+    def _collapse(self, frame: Optional[FrameType]) -> str:
+        if frame is None:
+            return ""
+        if not self.include_idle:
+            code = frame.f_code
+            if (os.path.basename(code.co_filename), code.co_name) in _IDLE_LEAVES:
+                return ""
+        parts: List[str] = []
+        while frame is not None:
+            parts.append(_label(frame))
+            frame = frame.f_back
+        parts.reverse()
+        return ";".join(parts)
+
+    def top(self, n: int = 10) -> List[Tuple[str, int]]:
+        """Leaf functions by sample count (self time)."""
+        leaves: Counter[str] = Counter()
+        for stack, count in self._stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        return leaves.most_common(n)
+
+    def write(self) -> Path:
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self._started_at))
+        path = self.out_dir / f"profile-{stamp}-{os.getpid()}.collapsed"
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in sorted(self._stacks.items()):
+                f.write(f"{stack} {count}\n")
+        return path
+
+    def summary(self) -> str:
+        total = sum(self._stacks.values())
+        lines = [f"Profil: {self._samples} échantillons ({self.interval_s * 1000.0:.0f} ms), {total} piles actives"]
+        for leaf, count in self.top():
+            lines.append(f"  {count / total if total else 0.0:6.1%}  {leaf}")
+        return "\n".join(lines)
@@ -0,0 +1,298 @@
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import queue
+import struct
+import threading
+import time
+import wave
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+# File layout (little endian), fixed size once created:
+#   header  (HEADER_SIZE bytes)
+#   index   (index_slots * SLOT_SIZE bytes) ring of utterance records
+#   data    (capacity bytes) ring of int16 mono PCM
+_MAGIC = b"VOXRING1"
+_HEADER = struct.Struct("<8sIIIIQQQ")  # magic, version, sample_rate, slot_size, index_slots, capacity, data_total, index_total
+_SLOT_HEAD = struct.Struct("<QQdI")  # start, end, wall time, payload length
+HEADER_SIZE = 4096
+SLOT_SIZE = 512
+_VERSION = 1
+
+
+@dataclass(frozen=True)
+class RecordedUtterance:
+    index: int
+    start: int
+    end: int
+    ts: float
+    info: Dict[str, Any]
+
+    @property
+    def duration_s(self) -> float:
+        return (self.end - self.start) / 2 / int(self.info.get("sample_rate", 16000))
+
+
+class RingRecorder:
+    """Rolling int16 recording in a fixed-size memory-mapped file.
+
+    `feed()` and `mark()` only queue references; a writer thread copies the
+    buffers into the map, so the capture/decode threads never touch the disk.
+    Offsets are absolute byte counts since the file was created; audio older
+    than `capacity` bytes is overwritten.
+    """
+
+    def __init__(self, path: str, *, capacity: int, sample_rate: int, index_slots: int = 4096) -> None:
+        self.path = Path(path).expanduser()
+        self.capacity = max(2, int(capacity) // 2 * 2)
+        self.sample_rate = int(sample_rate)
+        self.index_slots = max(1, int(index_slots))
+        self._data_off = HEADER_SIZE + self.index_slots * SLOT_SIZE
+        size = self._data_off + self.capacity
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fresh = os.fstat(fd).st_size != size
+            if fresh:
+                os.ftruncate(fd, size)
+            self._mm = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+
+        header = _HEADER.unpack_from(self._mm, 0)
+        geometry = (_MAGIC, _VERSION, self.sample_rate, SLOT_SIZE, self.index_slots, self.capacity)
+        if fresh or header[:6] != geometry:
+            self._mm[:HEADER_SIZE] = bytes(HEADER_SIZE)
+            self._data_total = 0
+            self._index_total = 0
+            self._write_header()
+        else:
+            # Same geometry: keep the previous session's audio and index
+            self._data_total, self._index_total = header[6], header[7]
+
+        self._fed = self._data_total  # advanced by the producer thread
+        self._queue: queue.Queue[Optional[Tuple[str, Any]]] = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=f"recorder-{self.path.name}", daemon=True)
+        self._thread.start()
+
+    @property
+    def position(self) -> int:
+        """Absolute offset just after the last fed byte."""
+        return self._fed
+
+    def feed(self, data: bytes) -> int:
+        """Queue PCM for writing (no copy) and return the new absolute position."""
+        if data:
+            self._queue.put(("data", data))
+            self._fed += len(data)
+        return self._fed
+
+    def mark(self, start: int, end: int, info: Dict[str, Any]) -> None:
+        """Record an utterance spanning [start, end) with its text/intent."""
+        self._queue.put(("mark", (start, end, time.time(), info)))
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join(timeout=5.0)
+        try:
+            self._mm.flush()
+        finally:
+            self._mm.close()
+
+    def _run(self) -> None:
+        last_flush = time.monotonic()
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            kind, payload = item
+            if kind == "data":
+                self._write_data(payload)
+            else:
+                self._write_mark(*payload)
+            self._write_header()
+            if time.monotonic() - last_flush > 5.0 and self._queue.empty():
+                self._mm.flush()
+                last_flush = time.monotonic()
+
+    def _write_data(self, data: bytes) -> None:
+        view = memoryview(data)
+        if len(view) > self.capacity:
+            skipped = len(view) - self.capacity
+            self._data_total += skipped
+            view = view[skipped:]
+        pos = self._data_total % self.capacity
+        first = min(len(view), self.capacity - pos)
+        base = self._data_off
+        self._mm[base + pos : base + pos + first] = view[:first]
+        if first < len(view):
+            self._mm[base : base + len(view) - first] = view[first:]
+        self._data_total += len(view)
+
+    def _write_mark(self, start: int, end: int, ts: float, info: Dict[str, Any]) -> None:
+        payload = json.dumps(info, ensure_ascii=False).encode("utf-8")
+        room = SLOT_SIZE - _SLOT_HEAD.size
+        if len(payload) > room:
+            # Keep the record parseable: drop the free text first
+            info = {k: v for k, v in info.items() if k != "message"}
+            text = str(info.get("text") or "")
+            # Longest transcript prefix that fits (escaping makes bytes != chars)
+            lo, hi = 0, len(text)
+            while lo < hi:
+                mid = (lo + hi + 1) // 2
+                info["text"] = text[:mid]
+                if len(json.dumps(info, ensure_ascii=False).encode("utf-8")) <= room:
+                    lo = mid
+                else:
+                    hi = mid - 1
+            info["text"] = text[:lo]
+            payload = json.dumps(info, ensure_ascii=False).encode("utf-8")
+            if len(payload) > room:
+                payload = b"{}"
+        off = HEADER_SIZE + (self._index_total % self.index_slots) * SLOT_SIZE
+        self._mm[off : off + SLOT_SIZE] = bytes(SLOT_SIZE)
+        _SLOT_HEAD.pack_into(self._mm, off, start, end, ts, len(payload))
+        self._mm[off + _SLOT_HEAD.size : off + _SLOT_HEAD.size + len(payload)] = payload
+        self._index_total += 1
+
+    def _write_header(self) -> None:
+        _HEADER.pack_into(
+            self._mm,
+            0,
+            _MAGIC,
+            _VERSION,
+            self.sample_rate,
+            SLOT_SIZE,
+            self.index_slots,
+            self.capacity,
+            self._data_total,
+            self._index_total,
+        )
+
+
+class RingReader:
+    """Read-only view of a RingRecorder file (works while it is being written)."""
+
+    def __init__(self, path: str) -> None:
+        self.path = Path(path).expanduser()
+        with open(self.path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, rate, slot_size, slots, capacity, data_total, index_total = _HEADER.unpack_from(self._mm, 0)
+        if magic != _MAGIC or version != _VERSION:
+            self._mm.close()
+            raise ValueError(f"Pas un enregistrement voice ring: {self.path}")
+        self.sample_rate = rate
+        self.slot_size = slot_size
+        self.index_slots = slots
+        self.capacity = capacity
+        self.data_total = data_total
+        self.index_total = index_total
+        self._data_off = HEADER_SIZE + slots * slot_size
+
+    def close(self) -> None:
+        self._mm.close()
+
+    def utterances(self) -> List[RecordedUtterance]:
+        """Index records whose audio is still in the ring, oldest first."""
+        out: List[RecordedUtterance] = []
+        oldest_audio = max(0, self.data_total - self.capacity)
+        for i in range(max(0, self.index_total - self.index_slots), self.index_total):
+            off = HEADER_SIZE + (i % self.index_slots) * self.slot_size
+            start, end, ts, n = _SLOT_HEAD.unpack_from(self._mm, off)
+            if start < oldest_audio or end > self.data_total:
+                continue
+            raw = bytes(self._mm[off + _SLOT_HEAD.size : off + _SLOT_HEAD.size + n])
+            try:
+                info = json.loads(raw.decode("utf-8"))
+            except (UnicodeDecodeError, json.JSONDecodeError):
+                info = {}
+            info.setdefault("sample_rate", self.sample_rate)
+            out.append(RecordedUtterance(index=i, start=start, end=end, ts=ts, info=info))
+        return out
+
+    def read(self, start: int, end: int) -> bytes:
+        start = max(start, self.data_total - self.capacity, 0)
+        end = min(end, self.data_total)
+        if end <= start:
+            return b""
+        pos = start % self.capacity
+        n = end - start
+        first = min(n, self.capacity - pos)
+        base = self._data_off
+        data = self._mm[base + pos : base + pos + first]
+        if first < n:
+            data += self._mm[base : base + n - first]
+        return data
+
+    def write_wav(self, utt: RecordedUtterance, out_path: str, *, pad_ms: int = 0) -> Path:
+        pad = int(self.sample_rate * pad_ms / 1000) * 2
+        pcm = self.read(utt.start - pad, utt.end + pad)
+        out = Path(out_path)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        with wave.open(str(out), "wb") as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(self.sample_rate)
+            wf.writeframes(pcm)
+        return out
+
+
+def recorder_path_for(template: str, source: str, multi: bool) -> str:
+    """One file per source: '{source}' in the template, or a suffix when several sources share it."""
+    if "{source}" in template:
+        return template.replace("{source}", source)
+    if multi:
+        p = Path(template)
+        return str(p.with_name(f"{p.stem}.{source}{p.suffix}"))
+    return template
+
+
+def run_extract(
+    path: str,
+    *,
+    index: Optional[int] = None,
+    last: bool = False,
+    out: Optional[str] = None,
+    out_dir: Optional[str] = None,
+    pad_ms: int = 0,
+) -> int:
+    """List the recorded utterances, or export one (or all) as WAV."""
+    try:
+        reader = RingReader(path)
+    except (OSError, ValueError) as exc:
+        print(f"Lecture impossible: {exc}", flush=True)
+        return 2
+
+    try:
+        utts = reader.utterances()
+        if index is None and not last and not out_dir:
+            for u in utts:
+                stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(u.ts))
+                print(
+                    f"#{u.index:<6} {stamp} {u.duration_s:6.2f}s "
+                    f"[{u.info.get('source', '?')}] {u.info.get('text', '')!r} "
+                    f"-> {u.info.get('intent') or '-'} {u.info.get('message') or ''}".rstrip(),
+                    flush=True,
+                )
+            return 0
+
+        if out_dir:
+            for u in utts:
+                reader.write_wav(u, str(Path(out_dir) / f"utt-{u.index:06d}.wav"), pad_ms=pad_ms)
+            print(f"{len(utts)} énoncés exportés dans {out_dir}", flush=True)
+            return 0
+
+        chosen = utts[-1] if last and utts else next((u for u in utts if u.index == index), None)
+        if chosen is None:
+            print("Énoncé introuvable (écrasé ou index invalide)", flush=True)
+            return 1
+        target = reader.write_wav(chosen, out or f"utt-{chosen.index:06d}.wav", pad_ms=pad_ms)
+        print(f"Écrit: {target}", flush=True)
+        return 0
+    finally:
+        reader.close()
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+from math import gcd
+
+import numpy as np
+
+
+class PolyphaseResampler:
+    """Streaming int16 downmix + rational resampler (polyphase FIR).
+
+    Converts interleaved int16 frames at `in_rate` with `channels` channels
+    into int16 mono at `out_rate`. The filter state is carried across calls,
+    so blocks of any size can be fed back to back without seams.
+    """
+
+    def __init__(self, in_rate: int, out_rate: int, channels: int = 1, *, taps_per_phase: int = 32) -> None:
+        if in_rate <= 0 or out_rate <= 0:
+            raise ValueError("Fréquences d'échantillonnage invalides")
+        if channels <= 0:
+            raise ValueError("Nombre de canaux invalide")
+        g = gcd(int(in_rate), int(out_rate))
+        self.in_rate = int(in_rate)
+        self.out_rate = int(out_rate)
+        self.channels = int(channels)
+        self.up = self.out_rate // g
+        self.down = self.in_rate // g
+        self.passthrough = self.up == self.down == 1 and self.channels == 1
+
+        k = max(4, int(taps_per_phase))
+        self.taps_per_phase = k
+        n = k * self.up
+        # Windowed-sinc lowpass at the lower Nyquist, designed at the upsampled rate
+        cutoff = 0.5 / max(self.up, self.down) * 0.95
+        t = np.arange(n, dtype=np.float64) - (n - 1) / 2.0
+        h = 2.0 * cutoff * np.sinc(2.0 * cutoff * t) * np.kaiser(n, 8.0)
+        h *= self.up / h.sum()
+        # phases[p, j] multiplies x[i - (k - 1 - j)] for output phase p (taps reversed for the window view)
+        self._phases = h.reshape(k, self.up).T[:, ::-1].astype(np.float32).copy()
+        self._history = np.zeros(k - 1, dtype=np.float32)
+        self._next = 0  # next output position on the upsampled grid, relative to the current block
+
+    def reset(self) -> None:
+        self._history[:] = 0.0
+        self._next = 0
+
+    def process(self, data: bytes) -> bytes:
+        if self.passthrough:
+            return data
+
+        frames = np.frombuffer(data, dtype=np.int16)
+        frames = frames[: len(frames) // self.channels * self.channels]
+        if self.channels > 1:
+            x = frames.reshape(-1, self.channels).mean(axis=1, dtype=np.float32)
+        else:
+            x = frames.astype(np.float32)
+        n_in = len(x)
+        if n_in == 0:
+            return b""
+
+        span = n_in * self.up
+        buf = np.concatenate((self._history, x))
+        if self._next < span:
+            pos = np.arange(self._next, span, self.down, dtype=np.int64)
+            idx = pos // self.up
+            windows = np.lib.stride_tricks.sliding_window_view(buf, self.taps_per_phase)[idx]
+            y = np.einsum("mk,mk->m", windows, self._phases[pos % self.up])
+            self._next = int(pos[-1]) + self.down - span
+        else:
+            y = np.empty(0, dtype=np.float32)
+            self._next -= span
+
+        self._history = buf[len(buf) - (self.taps_per_phase - 1) :].copy()
+        return np.clip(np.rint(y), -32768, 32767).astype(np.int16).tobytes()
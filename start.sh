@@ -15,8 +15,15 @@ fi
 # shellcheck disable=SC1091
 source .venv/bin/activate
 
-python -m pip install --upgrade pip >/dev/null
-pip install -r requirements.txt
+# Dependencies are only (re)installed when requirements.txt changes
+# (hash stamp in the venv). FORCE_PIP_INSTALL=1 forces it.
+REQ_STAMP=".venv/.requirements.sha256"
+req_hash="$(python -c 'import hashlib, sys; print(hashlib.sha256(open("requirements.txt", "rb").read() + sys.version.encode()).hexdigest())')"
+if [[ "${FORCE_PIP_INSTALL:-0}" == "1" || ! -f "$REQ_STAMP" || "$(cat "$REQ_STAMP")" != "$req_hash" ]]; then
+  python -m pip install --upgrade pip >/dev/null
+  pip install -r requirements.txt
+  echo "$req_hash" > "$REQ_STAMP"
+fi
 
 MODEL_URL_DEFAULT="https://alphacephei.com/vosk/models/vosk-model-small-fr-0.22.zip"
 
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import os
+import socket
+import time
+from typing import List, Tuple
+
+
+def sd_notify(state: str) -> bool:
+    """Send a systemd notification (e.g. "READY=1") if $NOTIFY_SOCKET is set.
+
+    Best-effort, no dependency on python-systemd.
+    """
+    addr = os.environ.get("NOTIFY_SOCKET")
+    if not addr:
+        return False
+    if addr.startswith("@"):
+        # Abstract namespace socket
+        addr = "\0" + addr[1:]
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+            sock.connect(addr)
+            sock.sendall(state.encode("utf-8"))
+        return True
+    except OSError:
+        return False
+
+
+class StartupTimer:
+    """Wall-clock breakdown of the startup phases (ms)."""
+
+    def __init__(self) -> None:
+        self._t0 = time.perf_counter()
+        self._last = self._t0
+        self.phases: List[Tuple[str, float]] = []
+
+    def mark(self, phase: str) -> None:
+        """Close a phase that ran on the main thread."""
+        now = time.perf_counter()
+        self.phases.append((phase, (now - self._last) * 1000.0))
+        self._last = now
+
+    def add(self, phase: str, ms: float) -> None:
+        """Record a phase that ran in the background (not on the main timeline)."""
+        self.phases.append((phase, ms))
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self._t0) * 1000.0
+
+    def summary(self) -> str:
+        parts = ", ".join(f"{name} {ms:.0f} ms" for name, ms in self.phases)
+        return f"Prêt en {self.elapsed_ms():.0f} ms ({parts})"
@@ -0,0 +1,727 @@
+from __future__ import annotations
+
+import json
+import os
+import queue
+import socket
+import stat
+import threading
+import time
+import wave
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+
+def _print(msg: str) -> None:
+    print(msg, flush=True)
+
+
+@dataclass(frozen=True)
+class Utterance:
+    source: str
+    text: str
+    ts: float
+    # Byte offsets of the utterance audio in the source's recording (see recorder.py)
+    start: int = 0
+    end: int = 0
+    # Why the utterance ended: "" (Vosk endpoint), "max_length", "silence", "stable_partial" or "eof"
+    forced: str = ""
+
+
+END_OF_SEGMENT = b""
+
+
+class AudioSource:
+    """One stream of int16 mono PCM.
+
+    `chunks()` yields raw bytes until the source ends (or `close()` is called).
+    An empty chunk (`END_OF_SEGMENT`) marks the end of one producer (socket
+    client, FIFO writer) on a source that keeps running: the recognizer
+    flushes its final result there instead of merging it with the next one.
+    """
+
+    def __init__(self, name: str, sample_rate: int) -> None:
+        self.name = name
+        self.sample_rate = int(sample_rate)
+        self._closed = threading.Event()
+
+    def start(self) -> None:
+        """Acquire the underlying resource (device, socket...)."""
+
+    def chunks(self) -> Iterator[bytes]:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        self._closed.set()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed.is_set()
+
+
+class RollingStats:
+    """Count, mean and max, plus percentiles over the last `window` values."""
+
+    def __init__(self, window: int = 1000) -> None:
+        self._window: deque[float] = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value: float) -> None:
+        self._window.append(value)
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, q: float) -> float:
+        if not self._window:
+            return 0.0
+        ordered = sorted(self._window)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def reset(self) -> None:
+        self._window.clear()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+
+class DeviceSource(AudioSource):
+    """sounddevice input (microphone).
+
+    By default PortAudio delivers mono int16 at the model rate. With
+    `native=True` the device is opened at its own rate and channel count and
+    blocks are downmixed/resampled to the model rate in-process (NumPy),
+    with the per-block cost tracked in `stats` (microseconds).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        device: Any,
+        sample_rate: int,
+        blocksize: int = 8000,
+        *,
+        native: bool = False,
+        block_ms: Optional[float] = None,
+        channels: Optional[int] = None,
+        taps_per_phase: int = 32,
+        stats_interval_s: float = 0.0,
+    ) -> None:
+        super().__init__(name, sample_rate)
+        self.device = device
+        self.blocksize = int(blocksize)
+        self.native = native
+        self.block_ms = block_ms
+        self.channels = channels
+        self.taps_per_phase = taps_per_phase
+        self.stats_interval_s = stats_interval_s
+        self.stats = RollingStats()
+        self._resampler: Any = None
+        self._block_s = self.blocksize / self.sample_rate
+        self._queue: queue.Queue[Optional[bytes]] = queue.Queue()
+        self._stream: Any = None
+
+    def start(self) -> None:
+        import sounddevice as sd
+
+        capture_rate = self.sample_rate
+        capture_channels = 1
+        if self.native:
+            from resample import PolyphaseResampler
+
+            info = sd.query_devices(self.device, "input")
+            capture_rate = int(info["default_samplerate"])
+            # Two channels cover stereo mics; wider arrays would only add downmix cost
+            capture_channels = int(self.channels or min(2, int(info["max_input_channels"] or 1)))
+            self._resampler = PolyphaseResampler(
+                capture_rate,
+                self.sample_rate,
+                capture_channels,
+                taps_per_phase=self.taps_per_phase,
+            )
+        blocksize = self.blocksize
+        if self.block_ms is not None:
+            blocksize = max(1, int(capture_rate * self.block_ms / 1000.0))
+        self._block_s = blocksize / capture_rate
+
+        def callback(indata, frames, time_info, status):  # noqa: ANN001
+            if status:
+                # Avoid spamming
+                return
+            self._queue.put(bytes(indata))
+
+        self._stream = sd.RawInputStream(
+            samplerate=capture_rate,
+            blocksize=blocksize,
+            device=self.device,
+            dtype="int16",
+            channels=capture_channels,
+            callback=callback,
+        )
+        self._stream.start()
+        if self.native:
+            _print(
+                f"[{self.name}] capture native {capture_rate} Hz x{capture_channels} -> {self.sample_rate} Hz, "
+                f"bloc {self._block_s * 1000.0:.0f} ms"
+            )
+
+    def chunks(self) -> Iterator[bytes]:
+        last_report = time.monotonic()
+        while True:
+            data = self._queue.get()
+            if data is None:
+                return
+            if self._resampler is not None:
+                t0 = time.perf_counter()
+                data = self._resampler.process(data)
+                self.stats.add((time.perf_counter() - t0) * 1e6)
+                if self.stats_interval_s > 0 and time.monotonic() - last_report >= self.stats_interval_s:
+                    last_report = time.monotonic()
+                    _print(self.stats_line())
+                    self.stats.reset()
+            yield data
+
+    def stats_line(self) -> str:
+        block_us = self._block_s * 1e6
+        load = self.stats.mean / block_us if block_us else 0.0
+        return (
+            f"[{self.name}] resample: {self.stats.count} blocs, moy {self.stats.mean:.0f} µs, "
+            f"p95 {self.stats.percentile(0.95):.0f} µs, max {self.stats.max:.0f} µs "
+            f"({load:.2%} du temps réel, bloc {self._block_s * 1000.0:.0f} ms)"
+        )
+
+    def close(self) -> None:
+        super().close()
+        if self._stream is not None:
+            try:
+                self._stream.stop()
+                self._stream.close()
+            except Exception:
+                pass
+            self._stream = None
+        self._queue.put(None)
+
+
+class FileSource(AudioSource):
+    """Raw PCM or WAV file, or a FIFO carrying either.
+
+    A FIFO is reopened when its writer goes away, so several producers can
+    take turns; a regular file ends the source at EOF.
+    """
+
+    def __init__(self, name: str, path: str, sample_rate: int, chunk_bytes: int = 8000) -> None:
+        super().__init__(name, sample_rate)
+        self.path = Path(path).expanduser()
+        self.chunk_bytes = max(2, int(chunk_bytes) // 2 * 2)
+
+    def _is_fifo(self) -> bool:
+        try:
+            return stat.S_ISFIFO(os.stat(self.path).st_mode)
+        except OSError:
+            return False
+
+    def chunks(self) -> Iterator[bytes]:
+        fifo = self._is_fifo()
+        while not self.closed:
+            with open(self.path, "rb") as f:
+                yield from read_pcm_chunks(f, self.chunk_bytes, expected_rate=self.sample_rate)
+            if not fifo:
+                return
+            yield END_OF_SEGMENT
+
+    def close(self) -> None:
+        super().close()
+        if self._is_fifo():
+            # Unblock a reader waiting in open() for a writer
+            try:
+                fd = os.open(self.path, os.O_WRONLY | os.O_NONBLOCK)
+                os.close(fd)
+            except OSError:
+                pass
+
+
+class SocketSource(AudioSource):
+    """Unix stream socket server; each client connection carries raw PCM."""
+
+    def __init__(self, name: str, path: str, sample_rate: int, chunk_bytes: int = 8000) -> None:
+        super().__init__(name, sample_rate)
+        self.path = Path(path).expanduser()
+        self.chunk_bytes = max(2, int(chunk_bytes) // 2 * 2)
+        self._server: Optional[socket.socket] = None
+
+    def start(self) -> None:
+        if self.path.exists() and stat.S_ISSOCK(os.stat(self.path).st_mode):
+            self.path.unlink()
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(str(self.path))
+        server.listen(1)
+        self._server = server
+
+    def chunks(self) -> Iterator[bytes]:
+        server = self._server
+        if server is None:
+            return
+        while not self.closed:
+            try:
+                conn, _ = server.accept()
+            except OSError:
+                return
+            with conn:
+                pending = b""
+                while not self.closed:
+                    try:
+                        data = conn.recv(self.chunk_bytes)
+                    except OSError:
+                        break
+                    if not data:
+                        break
+                    pending += data
+                    # Keep sample alignment across recv() boundaries
+                    cut = len(pending) // 2 * 2
+                    if cut:
+                        yield pending[:cut]
+                        pending = pending[cut:]
+            yield END_OF_SEGMENT
+
+    def close(self) -> None:
+        super().close()
+        if self._server is not None:
+            try:
+                self._server.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._server.close()
+            self._server = None
+            try:
+                self.path.unlink()
+            except OSError:
+                pass
+
+
+def read_pcm_chunks(f: Any, chunk_bytes: int, *, expected_rate: Optional[int] = None) -> Iterator[bytes]:
+    """Yield int16 mono PCM from a binary stream holding WAV or headerless PCM."""
+    head = f.read(4)
+    if not head:
+        return
+    if head == b"RIFF":
+        with wave.open(_Prefixed(head, f), "rb") as wf:
+            _check_wav(wf, expected_rate)
+            frames = max(1, chunk_bytes // 2)
+            while True:
+                data = wf.readframes(frames)
+                if not data:
+                    return
+                yield data
+    pending = head
+    while True:
+        data = f.read(chunk_bytes)
+        if not data:
+            break
+        pending += data
+        cut = len(pending) // 2 * 2
+        if cut >= chunk_bytes:
+            yield pending[:cut]
+            pending = pending[cut:]
+    cut = len(pending) // 2 * 2
+    if cut:
+        yield pending[:cut]
+
+
+def _check_wav(wf: wave.Wave_read, expected_rate: Optional[int]) -> None:
+    if wf.getnchannels() != 1 or wf.getsampwidth() != 2:
+        raise ValueError("WAV non supporté (attendu: mono, 16 bits)")
+    if expected_rate is not None and wf.getframerate() != expected_rate:
+        raise ValueError(f"WAV à {wf.getframerate()} Hz (attendu: {expected_rate} Hz)")
+
+
+class _Prefixed:
+    """Read-only file wrapper replaying bytes already consumed from `f`."""
+
+    def __init__(self, prefix: bytes, f: Any) -> None:
+        self._prefix = prefix
+        self._f = f
+
+    def read(self, n: int = -1) -> bytes:
+        if not self._prefix:
+            return self._f.read(n)
+        if n < 0:
+            out, self._prefix = self._prefix + self._f.read(), b""
+            return out
+        out, self._prefix = self._prefix[:n], self._prefix[n:]
+        if len(out) < n:
+            out += self._f.read(n - len(out))
+        return out
+
+
+@dataclass(frozen=True)
+class EndpointConfig:
+    """Forced endpointing limits (0 disables a rule).
+
+    - max_utterance_ms: force a final result once an utterance is this long
+      (background speech/TV can keep Vosk from ever ending one).
+    - trailing_silence_ms: force it once the audio has stayed below
+      `silence_rms` (int16 RMS per block) for this long after some sound.
+    - stable_partial_ms: force it when the partial text has not changed
+      for this long (no new words; this is not silence detection, and it
+      decodes a partial result after every block).
+    """
+
+    max_utterance_ms: int = 10000
+    trailing_silence_ms: int = 0
+    silence_rms: float = 300.0
+    stable_partial_ms: int = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_utterance_ms > 0 or self.trailing_silence_ms > 0 or self.stable_partial_ms > 0
+
+    @classmethod
+    def from_config(cls, cfg: Dict[str, Any]) -> "EndpointConfig":
+        return cls(
+            max_utterance_ms=int(cfg.get("endpoint_max_utterance_ms", cls.max_utterance_ms)),
+            trailing_silence_ms=int(cfg.get("endpoint_trailing_silence_ms", cls.trailing_silence_ms)),
+            silence_rms=float(cfg.get("endpoint_silence_rms", cls.silence_rms)),
+            stable_partial_ms=int(cfg.get("endpoint_stable_partial_ms", cls.stable_partial_ms)),
+        )
+
+
+def _block_rms(chunk: bytes) -> float:
+    """RMS level of an int16 PCM block."""
+    import numpy as np
+
+    samples = np.frombuffer(chunk, dtype=np.int16, count=len(chunk) // 2).astype(np.float32)
+    return float(np.sqrt(np.mean(samples * samples))) if samples.size else 0.0
+
+
+class SourceStartError(RuntimeError):
+    """An audio source could not be opened (device busy, path taken...)."""
+
+
+class _Channel:
+    """Per-source decode state; at most one drain task runs per channel."""
+
+    def __init__(self, source: AudioSource, recognizer: Any, recorder: Any = None) -> None:
+        self.source = source
+        self.recognizer = recognizer
+        self.recorder = recorder
+        self.pending: deque[Optional[bytes]] = deque()
+        self.lock = threading.Lock()
+        self.scheduled = False
+        # Absolute byte offsets of the audio fed to the recognizer
+        self.offset = recorder.position if recorder is not None else 0
+        self.utt_start = self.offset
+        # Forced endpointing: whether the utterance had sound, where the
+        # current quiet run began, last partial text and where it changed
+        self.voiced = False
+        self.silence_offset = self.offset
+        self.partial = ""
+        self.partial_offset = self.offset
+
+    def ms_since(self, offset: int) -> float:
+        return (self.offset - offset) / 2 / self.source.sample_rate * 1000.0
+
+
+class StreamManager:
+    """Decode N audio sources against one shared Vosk `Model`.
+
+    Each source is read by its own capture thread; decoding runs on a thread
+    pool sized to the CPU count (Vosk releases the GIL inside Kaldi), with
+    chunks of a given source always decoded in order. Final results from all
+    sources land in `results`; `None` is queued once every source has ended.
+
+    `recorders` optionally maps a source name to a RingRecorder fed with the
+    exact audio given to the recognizer.
+
+    `model` may be a Future (model loading in the background): sources start
+    capturing right away and their audio is buffered until it resolves. If
+    loading fails, `error` is set and `None` is queued in `results`.
+    `on_ready` is called once decoding can start (sources open, model loaded),
+    before any buffered audio is decoded.
+
+    `endpoint` bounds utterance length (see EndpointConfig); utterance
+    durations and forced endpoints are counted in `durations` /
+    `endpoint_counts` and printed every `stats_interval_s` seconds.
+    """
+
+    def __init__(
+        self,
+        model: Any,
+        sources: List[AudioSource],
+        *,
+        workers: Optional[int] = None,
+        recorders: Optional[Dict[str, Any]] = None,
+        endpoint: Optional[EndpointConfig] = None,
+        stats_interval_s: float = 0.0,
+        on_ready: Optional[Callable[[], None]] = None,
+    ) -> None:
+        if not sources:
+            raise ValueError("Aucune source audio")
+        names = [s.name for s in sources]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Noms de sources en double: {names}")
+        self.model = model
+        self.error: Optional[BaseException] = None
+        self.on_ready = on_ready
+        self._ready = not isinstance(model, Future)
+        self.sources = list(sources)
+        self.results: queue.Queue[Optional[Utterance]] = queue.Queue()
+        self.recorders: Dict[str, Any] = dict(recorders or {})
+        self.endpoint = endpoint or EndpointConfig()
+        self.stats_interval_s = stats_interval_s
+        self.durations = RollingStats()  # utterance durations (ms)
+        self.endpoint_counts: Dict[str, int] = {"vosk": 0, "max_length": 0, "silence": 0, "stable_partial": 0, "eof": 0}
+        self._stats_lock = threading.Lock()
+        self._last_report = time.monotonic()
+        max_workers = workers or min(len(self.sources), os.cpu_count() or 1)
+        self._pool = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="decode")
+        self._channels: List[_Channel] = []
+        self._threads: List[threading.Thread] = []
+        self._remaining = len(self.sources)
+        self._remaining_lock = threading.Lock()
+
+    def _make_recognizer(self, sample_rate: int) -> Any:
+        from vosk import KaldiRecognizer
+
+        return KaldiRecognizer(self.model, sample_rate)
+
+    def start(self) -> None:
+        for source in self.sources:
+            # Recognizers are created on first decode, once the model is there
+            channel = _Channel(source, None, self.recorders.get(source.name))
+            try:
+                source.start()
+            except Exception as exc:
+                # __exit__ does not run when __enter__ raises: close what is open
+                self.close()
+                raise SourceStartError(f"{source.name}: {exc}") from exc
+            self._channels.append(channel)
+        for channel in self._channels:
+            t = threading.Thread(
+                target=self._capture,
+                args=(channel,),
+                name=f"capture-{channel.source.name}",
+                daemon=True,
+            )
+            t.start()
+            self._threads.append(t)
+        if isinstance(self.model, Future):
+            self.model.add_done_callback(self._model_loaded)
+        elif self.on_ready is not None:
+            self.on_ready()
+
+    def _model_loaded(self, fut: Future) -> None:
+        exc = fut.exception()
+        if exc is not None:
+            self.error = exc
+            self.results.put(None)
+            return
+        self.model = fut.result()
+        if self.on_ready is not None:
+            self.on_ready()
+        self._ready = True
+        for channel in self._channels:
+            with channel.lock:
+                if not channel.pending or channel.scheduled:
+                    continue
+                channel.scheduled = True
+            self._submit(channel)
+
+    def close(self) -> None:
+        for source in self.sources:
+            source.close()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        if self.stats_interval_s > 0:
+            _print(self.stats_line())
+        for recorder in self.recorders.values():
+            recorder.close()
+
+    def __enter__(self) -> "StreamManager":
+        self.start()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def _capture(self, channel: _Channel) -> None:
+        try:
+            for chunk in channel.source.chunks():
+                self._feed(channel, chunk)
+        except Exception as exc:  # noqa: BLE001
+            _print(f"Source '{channel.source.name}' en erreur: {exc}")
+        self._feed(channel, None)
+
+    def _feed(self, channel: _Channel, chunk: Optional[bytes]) -> None:
+        with channel.lock:
+            channel.pending.append(chunk)
+            if channel.scheduled or not self._ready:
+                # Buffered until the model is loaded (see _model_loaded)
+                return
+            channel.scheduled = True
+        self._submit(channel)
+
+    def _submit(self, channel: _Channel) -> None:
+        try:
+            self._pool.submit(self._drain, channel)
+        except RuntimeError:
+            # Pool already shut down
+            pass
+
+    def _drain(self, channel: _Channel) -> None:
+        if channel.recognizer is None:
+            channel.recognizer = self._make_recognizer(channel.source.sample_rate)
+        rec = channel.recognizer
+        while True:
+            with channel.lock:
+                if not channel.pending:
+                    channel.scheduled = False
+                    return
+                chunk = channel.pending.popleft()
+
+            if chunk is None:
+                # End of source: flush what Kaldi still holds
+                self._emit(channel, rec.FinalResult(), "eof")
+                self._source_done()
+                continue
+            if not chunk:
+                # One producer left (END_OF_SEGMENT): flush, keep the source
+                self._emit(channel, rec.FinalResult(), "eof")
+                rec.Reset()
+                continue
+
+            if channel.recorder is not None:
+                # Only queues a reference: the recorder thread does the I/O
+                channel.recorder.feed(chunk)
+            channel.offset += len(chunk)
+            if rec.AcceptWaveform(chunk):
+                self._emit(channel, rec.Result())
+            elif self.endpoint.enabled:
+                reason = self._endpoint_reason(channel, chunk)
+                if reason:
+                    self._emit(channel, rec.FinalResult(), reason)
+                    rec.Reset()
+
+    def _endpoint_reason(self, channel: _Channel, chunk: bytes) -> str:
+        ep = self.endpoint
+        if ep.max_utterance_ms > 0 and channel.ms_since(channel.utt_start) >= ep.max_utterance_ms:
+            return "max_length"
+        if ep.trailing_silence_ms > 0:
+            if _block_rms(chunk) >= ep.silence_rms:
+                channel.voiced = True
+                channel.silence_offset = channel.offset
+            elif channel.voiced and channel.ms_since(channel.silence_offset) >= ep.trailing_silence_ms:
+                return "silence"
+        if ep.stable_partial_ms > 0:
+            # Partials are only decoded when this rule is on
+            partial = (json.loads(channel.recognizer.PartialResult()).get("partial") or "").strip()
+            if partial != channel.partial:
+                channel.partial = partial
+                channel.partial_offset = channel.offset
+            elif partial and channel.ms_since(channel.partial_offset) >= ep.stable_partial_ms:
+                return "stable_partial"
+        return ""
+
+    def _emit(self, channel: _Channel, raw_result: str, forced: str = "") -> None:
+        result = json.loads(raw_result)
+        text = (result.get("text") or "").strip()
+        duration_ms = channel.ms_since(channel.utt_start)
+        start, channel.utt_start = channel.utt_start, channel.offset
+        channel.voiced = False
+        channel.silence_offset = channel.offset
+        channel.partial = ""
+        channel.partial_offset = channel.offset
+        if text or forced not in {"", "eof"}:
+            self._count_endpoint(forced or "vosk", duration_ms)
+        if text:
+            self.results.put(
+                Utterance(
+                    source=channel.source.name,
+                    text=text,
+                    ts=time.monotonic(),
+                    start=start,
+                    end=channel.offset,
+                    forced=forced,
+                )
+            )
+
+    def _count_endpoint(self, reason: str, duration_ms: float) -> None:
+        with self._stats_lock:
+            self.durations.add(duration_ms)
+            self.endpoint_counts[reason] = self.endpoint_counts.get(reason, 0) + 1
+            if self.stats_interval_s > 0 and time.monotonic() - self._last_report >= self.stats_interval_s:
+                self._last_report = time.monotonic()
+                _print(self.stats_line())
+
+    def stats_line(self) -> str:
+        d = self.durations
+        counts = self.endpoint_counts
+        forced = counts.get("max_length", 0) + counts.get("silence", 0) + counts.get("stable_partial", 0)
+        total = sum(counts.values())
+        return (
+            f"[endpoint] {total} énoncés, durée moy {d.mean:.0f} ms, p95 {d.percentile(0.95):.0f} ms, "
+            f"max {d.max:.0f} ms; forcés: {forced} ({forced / total if total else 0.0:.1%}) "
+            f"[max_length={counts.get('max_length', 0)} silence={counts.get('silence', 0)} "
+            f"stable_partial={counts.get('stable_partial', 0)}]"
+        )
+
+    def _source_done(self) -> None:
+        with self._remaining_lock:
+            self._remaining -= 1
+            if self._remaining == 0:
+                self.results.put(None)
+
+
+def sources_from_config(cfg: Dict[str, Any]) -> List[AudioSource]:
+    """Build sources from `sources` (list) or the legacy single `device`.
+
+    Device capture options (`capture_native_rate`, `capture_block_ms`,
+    `capture_channels`, `resample_taps`) are read globally and can be
+    overridden per source.
+    """
+    sample_rate = int(cfg.get("sample_rate", 16000))
+    stats_interval_s = float(cfg.get("stats_interval_s", 0) or 0)
+
+    def device_source(name: str, item: Dict[str, Any]) -> DeviceSource:
+        rate = int(item.get("sample_rate", sample_rate))
+        block_ms = item.get("capture_block_ms", cfg.get("capture_block_ms"))
+        channels = item.get("capture_channels", cfg.get("capture_channels"))
+        return DeviceSource(
+            name,
+            item.get("device", None),
+            rate,
+            int(item.get("blocksize", 8000)),
+            native=bool(item.get("capture_native_rate", cfg.get("capture_native_rate", False))),
+            block_ms=float(block_ms) if block_ms is not None else None,
+            channels=int(channels) if channels else None,
+            taps_per_phase=int(item.get("resample_taps", cfg.get("resample_taps", 32))),
+            stats_interval_s=stats_interval_s,
+        )
+
+    raw = cfg.get("sources")
+    if not raw:
+        return [device_source("micro", {"device": cfg.get("device", None)})]
+
+    out: List[AudioSource] = []
+    for i, item in enumerate(raw):
+        if not isinstance(item, dict):
+            raise ValueError(f"Source #{i} invalide: {item!r}")
+        kind = str(item.get("type", "device"))
+        name = str(item.get("name") or f"{kind}{i}")
+        rate = int(item.get("sample_rate", sample_rate))
+        if kind == "device":
+            out.append(device_source(name, item))
+        elif kind in {"file", "fifo"}:
+            out.append(FileSource(name, str(item["path"]), rate, int(item.get("chunk_bytes", 8000))))
+        elif kind == "socket":
+            out.append(SocketSource(name, str(item["path"]), rate, int(item.get("chunk_bytes", 8000))))
+        else:
+            raise ValueError(f"Type de source inconnu: {kind}")
+    return out
@@ -0,0 +1,403 @@
+from __future__ import annotations
+
+import json
+import multiprocessing
+import os
+import sys
+from dataclasses import dataclass
+from itertools import product
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, List, Mapping, Optional, Sequence, Tuple
+
+from intents import (
+    _CLOSE_PATTERNS,
+    _OPEN_PATTERNS,
+    ResolvedApp,
+    _accept_app,
+    _rank_app,
+    build_apps_map,
+    normalize_text,
+)
+
+# (`app_aliases` key as written, normalized alias) from config `app_aliases`
+AliasRef = Tuple[str, str]
+
+
+@dataclass(frozen=True)
+class Sample:
+    phrase: str
+    expected: Optional[str]  # expected command, None = nothing should launch
+
+
+@dataclass(frozen=True)
+class Ranked:
+    """Threshold-independent outcome of `_rank_app` for one sample."""
+
+    name: Optional[str]
+    command: Optional[str]
+    score: float
+    spoken_len: int
+    fuzzy: bool
+
+
+@dataclass(frozen=True)
+class Setting:
+    threshold: float
+    short_threshold: float
+    min_len: int
+
+
+@dataclass(frozen=True)
+class Metrics:
+    precision: float
+    recall: float
+    false_launch_rate: float
+    f1: float
+    correct: int
+    wrong: int
+    launches: int
+
+
+def _app_phrase(text: str) -> str:
+    """Strip the open/close verb when the transcript is a full command."""
+    norm = normalize_text(text)
+    for pat in (*_OPEN_PATTERNS, *_CLOSE_PATTERNS):
+        m = pat.match(norm)
+        if m:
+            return m.group("app").strip()
+    return norm
+
+
+def load_corpus(path: str, apps_cfg: Dict[str, str]) -> Tuple[List[Sample], List[str]]:
+    """Read JSONL lines `{"text": ..., "expected": <app name or null>}`.
+
+    `app` is accepted instead of `expected` (e.g. hand-labeled batch output).
+    Returns the samples and warnings for skipped lines.
+    """
+    commands = {normalize_text(k): str(v) for k, v in apps_cfg.items()}
+    samples: List[Sample] = []
+    warnings: List[str] = []
+    with open(path, "r", encoding="utf-8") as f:
+        for lineno, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as exc:
+                warnings.append(f"ligne {lineno}: JSON invalide ({exc})")
+                continue
+            text = str(row.get("text") or "")
+            expected_raw = row.get("expected", row.get("app"))
+            expected: Optional[str] = None
+            if expected_raw:
+                expected = commands.get(normalize_text(str(expected_raw)))
+                if expected is None:
+                    warnings.append(f"ligne {lineno}: app attendue inconnue: {expected_raw}")
+                    continue
+            samples.append(Sample(phrase=_app_phrase(text), expected=expected))
+    return samples, warnings
+
+
+def _reduced_aliases(app_aliases: Dict[str, List[str]], removed: FrozenSet[AliasRef]) -> Dict[str, List[str]]:
+    if not removed:
+        return app_aliases
+    return {
+        app: [a for a in aliases if (app, normalize_text(str(a))) not in removed]
+        for app, aliases in app_aliases.items()
+    }
+
+
+def _effective_aliases(apps_cfg: Dict[str, str], app_aliases: Dict[str, List[str]]) -> List[AliasRef]:
+    """Config aliases whose removal changes the app map.
+
+    Each alias is diffed through build_apps_map itself (same lookup of the
+    `app_aliases` keys, same first-insertion-wins order): an alias that
+    takes a generated key over from a later app counts, a duplicate of a
+    key the map already has does not.
+    """
+    full = list(build_apps_map(apps_cfg, app_aliases=app_aliases).iter_items())
+    out: List[AliasRef] = []
+    seen = set()
+    for app, aliases in app_aliases.items():
+        for raw in aliases:
+            ref = (app, normalize_text(str(raw)))
+            if ref in seen:
+                continue
+            seen.add(ref)
+            without = build_apps_map(apps_cfg, app_aliases=_reduced_aliases(app_aliases, frozenset({ref})))
+            if list(without.iter_items()) != full:
+                out.append(ref)
+    return out
+
+
+# Per-worker state, set once by _init_worker
+_apps_cfg: Dict[str, str] = {}
+_app_aliases: Dict[str, List[str]] = {}
+_apps_cache: Tuple[Optional[FrozenSet[AliasRef]], Mapping[str, str]] = (None, {})
+
+
+def _init_worker(apps_cfg: Dict[str, str], app_aliases: Dict[str, List[str]]) -> None:
+    global _apps_cfg, _app_aliases, _apps_cache
+    _apps_cfg = apps_cfg
+    _app_aliases = app_aliases
+    _apps_cache = (None, {})
+
+
+def _apps_for(removed: FrozenSet[AliasRef]) -> Mapping[str, str]:
+    global _apps_cache
+    if _apps_cache[0] != removed:
+        _apps_cache = (removed, build_apps_map(_apps_cfg, app_aliases=_reduced_aliases(_app_aliases, removed)))
+    return _apps_cache[1]
+
+
+def _rank_chunk(task: Tuple[FrozenSet[AliasRef], List[str]]) -> List[Ranked]:
+    removed, phrases = task
+    apps = _apps_for(removed)
+    out: List[Ranked] = []
+    for phrase in phrases:
+        ranked = _rank_app(phrase, apps)
+        if ranked is None:
+            out.append(Ranked(None, None, 0.0, 0, False))
+        else:
+            best, spoken_len, fuzzy = ranked
+            out.append(Ranked(best.name, best.command, best.score, spoken_len, fuzzy))
+    return out
+
+
+class Tuner:
+    """Grid search over the app matching thresholds on a labeled corpus.
+
+    The expensive part (`_rank_app`, i.e. the scoring inside `_resolve_app`)
+    does not depend on thresholds: it runs once per sample on a process pool,
+    then every grid point is evaluated from the cached rankings.
+    """
+
+    def __init__(
+        self,
+        apps_cfg: Dict[str, str],
+        app_aliases: Dict[str, List[str]],
+        samples: Sequence[Sample],
+        *,
+        workers: Optional[int] = None,
+    ) -> None:
+        self.apps_cfg = apps_cfg
+        self.app_aliases = app_aliases
+        self.samples = list(samples)
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self._pool: Any = None
+        self._config_aliases: Optional[List[AliasRef]] = None
+
+    def __enter__(self) -> "Tuner":
+        self._pool = multiprocessing.Pool(
+            processes=self.workers,
+            initializer=_init_worker,
+            initargs=(self.apps_cfg, self.app_aliases),
+        )
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool = None
+
+    def rank(self, indices: Sequence[int], removed: FrozenSet[AliasRef] = frozenset()) -> List[Ranked]:
+        phrases = [self.samples[i].phrase for i in indices]
+        if not phrases:
+            return []
+        size = max(1, -(-len(phrases) // (self.workers * 4)))
+        tasks = [(removed, phrases[i : i + size]) for i in range(0, len(phrases), size)]
+        out: List[Ranked] = []
+        for part in self._pool.map(_rank_chunk, tasks):
+            out.extend(part)
+        return out
+
+    def evaluate(self, ranked: Sequence[Ranked], setting: Setting) -> Metrics:
+        correct = wrong = launches = 0
+        positives = 0
+        for sample, r in zip(self.samples, ranked):
+            if sample.expected is not None:
+                positives += 1
+            predicted = r.command
+            if predicted is not None and r.fuzzy:
+                if not _accept_app(
+                    ResolvedApp(name=r.name or "", command=predicted, score=r.score, exact=False),
+                    r.spoken_len,
+                    threshold=setting.threshold,
+                    short_threshold=setting.short_threshold,
+                    min_len=setting.min_len,
+                ):
+                    predicted = None
+            if predicted is None:
+                continue
+            launches += 1
+            if predicted == sample.expected:
+                correct += 1
+            else:
+                wrong += 1
+        precision = correct / launches if launches else 1.0
+        recall = correct / positives if positives else 1.0
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        n = len(self.samples)
+        return Metrics(
+            precision=precision,
+            recall=recall,
+            false_launch_rate=wrong / n if n else 0.0,
+            f1=f1,
+            correct=correct,
+            wrong=wrong,
+            launches=launches,
+        )
+
+    def grid(self, ranked: Sequence[Ranked], settings: Sequence[Setting]) -> List[Tuple[Setting, Metrics]]:
+        results = [(s, self.evaluate(ranked, s)) for s in settings]
+        # Best F1 first, then fewest false launches, then the strictest setting
+        results.sort(key=lambda sm: (-sm[1].f1, sm[1].false_launch_rate, -sm[0].threshold, -sm[0].short_threshold))
+        return results
+
+    def config_aliases(self) -> List[AliasRef]:
+        """Config aliases that actually change the app map."""
+        if self._config_aliases is None:
+            self._config_aliases = _effective_aliases(self.apps_cfg, self.app_aliases)
+        return self._config_aliases
+
+    def minimize_aliases(self, ranked: List[Ranked], setting: Setting) -> FrozenSet[AliasRef]:
+        """Greedily drop config aliases while correct launches don't drop and wrong ones don't rise.
+
+        Removing an alias can only change samples whose best candidate was that
+        alias, so each step re-ranks just those samples.
+        """
+        base = self.evaluate(ranked, setting)
+        current = list(ranked)
+        removed: FrozenSet[AliasRef] = frozenset()
+
+        candidates = self.config_aliases()
+        usage = {ref: 0 for ref in candidates}
+        for r in current:
+            for ref in candidates:
+                if r.name == ref[1]:
+                    usage[ref] += 1
+        # Try the least used aliases first: they are the most likely dead weight
+        for ref in sorted(candidates, key=lambda x: usage[x]):
+            trial_removed = removed | {ref}
+            removed_names = {a for _, a in trial_removed}
+            affected = [i for i, r in enumerate(current) if r.name in removed_names]
+            trial = list(current)
+            for i, r in zip(affected, self.rank(affected, trial_removed)):
+                trial[i] = r
+            m = self.evaluate(trial, setting)
+            if m.correct >= base.correct and m.wrong <= base.wrong:
+                removed = trial_removed
+                current = trial
+        return removed
+
+
+def parse_range(spec: str, cast: Any = float) -> List[Any]:
+    """'0.5:0.9:0.05' -> [0.5, 0.55, ..., 0.9]; '0.6,0.7' -> [0.6, 0.7]."""
+    if ":" in spec:
+        start_s, stop_s, step_s = (spec.split(":") + ["1"])[:3]
+        start, stop, step = cast(start_s), cast(stop_s), cast(step_s)
+        if step <= 0:
+            raise ValueError(f"Pas invalide: {spec}")
+        out = []
+        i = 0
+        while start + i * step <= stop + 1e-9:
+            out.append(cast(round(start + i * step, 6)))
+            i += 1
+        return out
+    return [cast(x) for x in spec.split(",") if x.strip()]
+
+
+def _fmt(setting: Setting, m: Metrics) -> str:
+    return (
+        f"threshold={setting.threshold:.2f} short={setting.short_threshold:.2f} min_len={setting.min_len}  "
+        f"precision={m.precision:.3f} recall={m.recall:.3f} false_launch={m.false_launch_rate:.3f} "
+        f"f1={m.f1:.3f} ({m.correct} ok / {m.wrong} faux / {m.launches} lancements)"
+    )
+
+
+def run_tune(
+    cfg: Dict[str, Any],
+    corpus_path: str,
+    *,
+    thresholds: str = "0.40:0.95:0.05",
+    short_thresholds: str = "0.80:1.00:0.05",
+    min_lens: str = "2:6:1",
+    workers: Optional[int] = None,
+    top: int = 10,
+    minimize: bool = True,
+    aliases_out: Optional[str] = None,
+) -> int:
+    apps_cfg = {str(k): str(v) for k, v in cfg.get("apps", {}).items()}
+    raw_aliases = cfg.get("app_aliases", {})
+    if not isinstance(raw_aliases, dict):
+        raw_aliases = {}
+    app_aliases = {str(k): list(v) if isinstance(v, list) else [] for k, v in raw_aliases.items()}
+
+    if not Path(corpus_path).exists():
+        print(f"Corpus introuvable: {corpus_path}", flush=True)
+        return 2
+    samples, warnings = load_corpus(corpus_path, apps_cfg)
+    for w in warnings:
+        print(f"Ignoré: {w}", file=sys.stderr, flush=True)
+    if not samples:
+        print("Corpus vide", flush=True)
+        return 2
+
+    try:
+        settings = [
+            Setting(t, s, n)
+            for t, s, n in product(parse_range(thresholds), parse_range(short_thresholds), parse_range(min_lens, int))
+        ]
+    except ValueError as exc:
+        print(f"Grille invalide: {exc}", flush=True)
+        return 2
+
+    current = Setting(
+        float(cfg.get("app_match_threshold", 0.72)),
+        float(cfg.get("app_short_threshold", 0.90)),
+        int(cfg.get("app_min_len", 4)),
+    )
+
+    with Tuner(apps_cfg, app_aliases, samples, workers=workers) as tuner:
+        ranked = tuner.rank(range(len(samples)))
+        results = tuner.grid(ranked, settings)
+        print(f"Corpus: {len(samples)} énoncés, {len(settings)} réglages, {tuner.workers} workers", flush=True)
+        print(f"Actuel:  {_fmt(current, tuner.evaluate(ranked, current))}", flush=True)
+        for i, (setting, m) in enumerate(results[: max(1, top)], 1):
+            print(f"#{i:<3} {_fmt(setting, m)}", flush=True)
+
+        if not minimize:
+            return 0
+
+        best = results[0][0]
+        removed = tuner.minimize_aliases(ranked, best)
+        # Of the surviving aliases, keep those that still change the map
+        # (first spelling of each)
+        reduced = _reduced_aliases(app_aliases, removed)
+        useful = set(_effective_aliases(apps_cfg, reduced))
+        kept: Dict[str, List[str]] = {}
+        for app, aliases in reduced.items():
+            kept[app] = []
+            for a in aliases:
+                ref = (app, normalize_text(str(a)))
+                if ref in useful:
+                    useful.discard(ref)
+                    kept[app].append(a)
+        before = len(build_apps_map(apps_cfg, app_aliases=app_aliases))
+        after = len(build_apps_map(apps_cfg, app_aliases=kept))
+        print(
+            f"Alias: {len(removed)} retirés sur {len(tuner.config_aliases())} "
+            f"(clés app map: {before} -> {after})",
+            flush=True,
+        )
+        for app, alias in sorted(removed):
+            print(f"  - {app}: {alias}", flush=True)
+
+        suggestion = json.dumps({"app_aliases": {k: v for k, v in kept.items() if v}}, ensure_ascii=False, indent=2)
+        if aliases_out:
+            Path(aliases_out).write_text(suggestion + "\n", encoding="utf-8")
+            print(f"app_aliases suggérés écrits dans {aliases_out}", flush=True)
+        else:
+            print(suggestion, flush=True)
+    return 0